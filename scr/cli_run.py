@@ -1,11 +1,21 @@
+import time
+_CLI_START = time.perf_counter()
+
 import argparse
-import cv2
+import logging
+import math
 import os
 import yaml
-from scr.utils.pipeline_builder import build_pipeline
-from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.coreclasses.output.formats import SINK_KINDS, STORE_FORMATS
+
+# Heavy modules (cv2/NumPy, DeepFace/TensorFlow, ultralytics/PyTorch) are
+# imported inside the run functions so --help and --validate_config stay fast.
+
+DEFAULT_CHECKPOINT_INTERVAL = 300.0  # seconds
 
 def run_image_mode(pipeline, input_path, output_path):
+    import cv2
+
     img = cv2.imread(input_path)
     if img is None:
         print(f"❌ Failed to load image: {input_path}")
@@ -14,6 +24,9 @@ def run_image_mode(pipeline, input_path, output_path):
     results, visual_img = pipeline.process(img)
 
     for idx, res in enumerate(results):
+        if "emotion" not in res:
+            print(f"[{idx+1}] Face at {res['box']} (no attributes: analysis disabled)")
+            continue
         print(f"[{idx+1}] Emotion: {res['emotion']}")
         if "age" in res and "gender" in res:
             print(f"    Age: {res['age']} | Gender: {res['gender']}")
@@ -21,26 +34,381 @@ def run_image_mode(pipeline, input_path, output_path):
     cv2.imwrite(output_path, visual_img)
     print(f"✅ Output saved to {output_path}")
 
+def grabber_class(args):
+    """VideoFrameGrabber, or ProcessFrameGrabber with --decode_process."""
+    if args.decode_process:
+        from scr.coreclasses.video.process_frame_grabber import ProcessFrameGrabber
+        return ProcessFrameGrabber
+    from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+    return VideoFrameGrabber
+
+def video_job(args):
+    """Settings a resumed video job must share with the run that wrote the journal."""
+    from scr.coreclasses.config_loader import ConfigLoader
+
+    return {
+        "input": os.path.abspath(args.input),
+        "input_size": os.path.getsize(args.input),
+        "config_hash": ConfigLoader(args.config).config_hash(),
+        "start_frame": args.start_frame,
+        "max_frames": args.max_frames,
+        "skip_frames": args.skip_frames,
+        "batch_size": args.batch_size,
+        "batch_skip": args.batch_skip,
+        "target_fps": args.target_fps,
+        "sample_interval": args.sample_interval,
+        "sink": sorted(args.sink),
+        "results": args.results,
+        "adaptive_fps": args.adaptive_fps,
+        "latency_budget_ms": args.latency_budget_ms,
+        "quiet_skip": args.quiet_skip,
+    }
+
+def make_sampler(args):
+    """AdaptiveSampler for --adaptive_fps / --latency_budget_ms / --quiet_skip, or None."""
+    if not (args.adaptive_fps or args.latency_budget_ms or args.quiet_skip):
+        return None
+    from scr.coreclasses.config_loader import ConfigLoader
+    from scr.coreclasses.processing.adaptive_sampler import AdaptiveSampler
+
+    return AdaptiveSampler(
+        target_fps=args.adaptive_fps,
+        latency_budget_ms=args.latency_budget_ms,
+        min_skip=args.skip_frames,
+        max_skip=max(args.skip_frames, args.max_skip),
+        quiet_skip=args.quiet_skip,
+        full_analysis=ConfigLoader(args.config).get()['pipeline'].get('full_analysis', False)
+    )
+
+def load_checkpoint(journal):
+    """The checkpoint to resume from, None to start over; exits if it belongs to another job."""
+    record = journal.load(journal.path)
+    if record is None:
+        print(f"⚠️ No job journal at {journal.path}; starting from the beginning")
+        return None
+    mismatches = journal.mismatches(record)
+    if mismatches:
+        raise SystemExit(f"❌ Cannot resume: {', '.join(mismatches)} differ from the journaled job "
+                         f"(run without --resume to start over)")
+    return record
+
 def run_video_mode(pipeline, args):
+    from scr.coreclasses.output.sinks import build_sink, restore_outputs
+    from scr.coreclasses.processing.job_journal import JobJournal
+    from scr.coreclasses.processing.result_store import ResultStore
+    from scr.utils.instrumentation import NULL_INSTRUMENTATION
+
     os.makedirs(args.output, exist_ok=True)
 
-    grabber = VideoFrameGrabber(
+    # Checkpointing is opt-in: an explicit interval, or --resume (which keeps checkpointing)
+    checkpoint_interval = args.checkpoint_interval
+    if checkpoint_interval is None:
+        checkpoint_interval = DEFAULT_CHECKPOINT_INTERVAL if args.resume else 0
+    journal = None
+    checkpoint = None
+    if checkpoint_interval > 0 or args.resume:
+        journal = JobJournal(os.path.join(args.output, "job_journal.json"), video_job(args),
+                             interval=checkpoint_interval)
+    if args.resume:
+        checkpoint = load_checkpoint(journal)
+        if (checkpoint is not None and not checkpoint["completed"] and args.max_frames
+                and checkpoint["frames_done"] >= args.max_frames):
+            # Stopped after the last batch was committed but before the job was marked
+            # completed (max_frames=0 would mean "no limit" to the grabber)
+            restore_outputs(checkpoint["outputs"])
+            checkpoint = journal.checkpoint(checkpoint["last_frame"], checkpoint["next_frame"],
+                                            checkpoint["frames_done"], checkpoint["outputs"],
+                                            sample_start=checkpoint["sample_start"], completed=True)
+        if checkpoint is not None and checkpoint["completed"]:
+            print(f"✅ Job already completed ({checkpoint['frames_done']} frames) → {args.output}")
+            return
+        if checkpoint is not None:
+            restore_outputs(checkpoint["outputs"])
+            print(f"⏩ Resuming after frame {checkpoint['last_frame']} "
+                  f"({checkpoint['frames_done']} frames already done)")
+
+    start_frame, sample_start, max_frames, frames_before = args.start_frame, None, args.max_frames, 0
+    if checkpoint is not None:
+        start_frame, sample_start = checkpoint["next_frame"], checkpoint["sample_start"]
+        frames_before = checkpoint["frames_done"]
+        if max_frames:
+            max_frames -= frames_before
+
+    metrics = make_instrumentation(args)
+    if metrics is not None and pipeline is not None:
+        pipeline.set_instrumentation(metrics)
+
+    sampler = make_sampler(args)
+    grabber_cls = grabber_class(args)
+    if sampler is not None and args.decode_process:
+        print("⚠️ Adaptive sampling changes the skip rate at runtime, which --decode_process cannot; "
+              "decoding in a thread")
+        from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+        grabber_cls = VideoFrameGrabber
+
+    grabber = grabber_cls(
         video_path=args.input,
         skip_frames=args.skip_frames,
-        max_frames=args.max_frames,
-        start_frame=args.start_frame,
+        max_frames=max_frames,
+        start_frame=start_frame,
         batch_size=args.batch_size,
         batch_skip=args.batch_skip,
-        queue_size=args.queue_size
+        # A short read-ahead lets skip changes take effect within a couple of batches
+        queue_size=min(args.queue_size, 2) if sampler is not None else args.queue_size,
+        skip_mode=args.skip_mode,
+        seek_threshold=args.seek_threshold,
+        target_fps=args.target_fps,
+        sample_interval=args.sample_interval,
+        sample_start=sample_start,
+        ring_buffer=args.ring_buffer,
+        memory_budget_mb=args.memory_budget_mb,
+        metrics=metrics or NULL_INSTRUMENTATION
     )
 
-    for batch_idx, frame_batch in enumerate(grabber):
-        for frame_idx, frame in enumerate(frame_batch):
-            results, visual_img = pipeline.process(frame)
+    grabber.open()
+    sink = build_sink(
+        args.sink,
+        args.output,
+        jpeg_quality=args.jpeg_quality,
+        scale=args.output_scale,
+        video_fps=args.video_fps or grabber.output_fps() or 25.0,
+        async_writers=args.async_writers,
+        queue_size=args.write_queue,
+        resume=checkpoint["outputs"] if checkpoint is not None else None,
+        # The rate is fixed at the start; adaptive skips are absorbed by timestamp placement
+        timed_video=sampler is not None
+    )
+
+    store = None
+    if args.results:
+        store = ResultStore(os.path.join(args.output, f"results.{args.results}"),
+                            fmt=args.results, chunk_size=args.results_chunk, append=checkpoint is not None)
+
+    last_frame = checkpoint["last_frame"] if checkpoint is not None else None
+
+    def commit(last_frame, frames_done, completed=False):
+        outputs = sink.commit() + (store.commit() if store is not None else [])
+        if last_frame is None:
+            sample_start, next_frame = None, start_frame  # nothing processed yet
+        elif grabber.sample_interval:
+            sample_start = start_frame / grabber.fps if checkpoint is None else checkpoint["sample_start"]
+            sample_start += (frames_done - frames_before) * grabber.sample_interval
+            next_frame = int(math.ceil(sample_start * grabber.fps - 1e-6))
+        else:
+            # Checkpoints fall on batch boundaries: one frame + skip, then batch_skip
+            sample_start = None
+            next_frame = (last_frame + 1 + grabber.skip_frames
+                          + args.batch_skip * (args.batch_size + grabber.skip_frames))
+        journal.checkpoint(last_frame, next_frame, frames_done, outputs,
+                           sample_start=sample_start, completed=completed)
+
+    def tagged_batches():
+        previous_index = last_frame
+        for frame_batch in grabber:
+            if args.workers > 1:
+                # Batches are pickled to workers after the grabber reuses ring slots
+                frame_batch = [grabber.retain(frame) for frame in frame_batch]
+            indices = list(grabber.batch_frame_indices)
+            batch_kwargs = {
+                "frame_indices": indices,
+                "timestamps": [grabber.timestamp_of(i) for i in indices],
+            }
+            if sampler is not None:
+                decision = sampler.decision()
+                sampling = []
+                for frame_index, frame in zip(indices, frame_batch):
+                    change = sampler.measure(frame)
+                    stride = None if previous_index is None else frame_index - previous_index
+                    sampling.append(dict(decision, stride=stride, change=change))
+                    previous_index = frame_index
+                batch_kwargs["sampling"] = sampling
+            yield indices, frame_batch, batch_kwargs
 
-            out_path = os.path.join(args.output, f"frame_{batch_idx:05d}_{frame_idx}.jpg")
-            cv2.imwrite(out_path, visual_img)
-            print(f"✅ Saved: {out_path}")
+    runner = None
+    if args.workers > 1:
+        from scr.coreclasses.config_loader import ConfigLoader
+        from scr.utils.parallel_pipeline import ParallelPipeline
+        cfg = ConfigLoader(args.config).get()
+        stateful = [name for name in ('tracking', 'motion_gate') if cfg.get(name, {}).get('enabled', False)]
+        if stateful:
+            print(f"⚠️ {' and '.join(stateful)} disabled with --workers > 1: "
+                  f"each worker sees only 1 in {args.workers} batches")
+        runner = ParallelPipeline(args.workers, args.config, max_in_flight=args.max_in_flight)
+        outputs = runner.imap(tagged_batches())
+    else:
+        outputs = ((indices, pipeline.process_batch(frame_batch, **batch_kwargs))
+                   for indices, frame_batch, batch_kwargs in tagged_batches())
+
+    frames_done = frames_before
+    batch_done_at = None
+    try:
+        for indices, batch_outputs in outputs:
+            for frame_index, (frame_result, visual_img) in zip(indices, batch_outputs):
+                if args.async_writers:
+                    visual_img = grabber.retain(visual_img)  # written after its ring slot is reused
+                sink.write(frame_index, frame_result, visual_img)
+                if store is not None:
+                    store.append(frame_result)
+                frames_done += 1
+                last_frame = frame_index
+            if sampler is not None:
+                # Wall time per batch (decode + inference + writes); the first includes model loading
+                now = time.perf_counter()
+                if batch_done_at is not None:
+                    sampler.observe(len(indices), now - batch_done_at)
+                batch_done_at = now
+                grabber.skip_frames = sampler.skip
+            if metrics is not None:
+                metrics.maybe_dump()
+            if journal is not None and checkpoint_interval > 0 and journal.due():
+                commit(last_frame, frames_done)
+        if journal is not None:
+            commit(last_frame, frames_done, completed=True)
+    finally:
+        if runner:
+            runner.close()
+        sink.close()
+        if store is not None:
+            store.close()
+        if pipeline is not None:
+            pipeline.publish_stats()
+        if metrics is not None:
+            metrics.emit()
+
+    print(f"✅ Processed {frames_done - frames_before} frames → {args.output}")
+
+def run_sharded_video_mode(args):
+    """
+    Split one video into keyframe-aligned segments and process them in
+    parallel worker processes. Annotations and results are merged in frame
+    order; JPEGs keep global frame names; the video sink writes one file per
+    segment under <output>/segments/.
+    """
+    from scr.coreclasses.output.sinks import AnnotationSink
+    from scr.coreclasses.processing.result_store import ResultStore
+    from scr.coreclasses.video.video_index import VideoIndex
+    from scr.utils.sharded_video import ShardedVideoRunner
+
+    os.makedirs(args.output, exist_ok=True)
+    workers = args.workers
+    if args.batch_skip:
+        print("⚠️ --batch_skip is not supported with --sharded; ignoring it")
+
+    index_path = args.index_path or os.path.join(args.output, f"{os.path.basename(args.input)}.index.json")
+    index = VideoIndex.load_or_build(args.input, index_path)
+    sample_interval = 1.0 / args.target_fps if args.target_fps else args.sample_interval
+    end_frame = None
+    if args.max_frames:
+        if sample_interval and index.fps:
+            end_frame = int(math.ceil((args.start_frame / index.fps + args.max_frames * sample_interval)
+                                      * index.fps - 1e-6))
+        else:
+            end_frame = args.start_frame + args.max_frames * (args.skip_frames + 1)
+
+    segments = index.segments(args.segments or 4 * workers, start=args.start_frame, end=end_frame)
+    segments = ShardedVideoRunner.align_segments(segments, args.start_frame, args.skip_frames,
+                                                 sample_interval, index.fps)
+    print(f"🧩 {len(segments)} segments over {workers} workers ({index.total_frames} frames)")
+
+    output_fps = 1.0 / sample_interval if sample_interval else (
+        index.fps / (args.skip_frames + 1) if index.fps else None)
+    grabber_kwargs = {
+        "video_path": args.input,
+        "skip_frames": args.skip_frames,
+        "batch_size": args.batch_size,
+        "queue_size": args.queue_size,
+        "skip_mode": args.skip_mode,
+        "seek_threshold": args.seek_threshold,
+        "sample_interval": sample_interval,
+        "ring_buffer": args.ring_buffer,
+        "memory_budget_mb": args.memory_budget_mb,
+    }
+    sink_kwargs = {"jpeg_quality": args.jpeg_quality, "scale": args.output_scale,
+                   "video_fps": args.video_fps or output_fps or 25.0}
+
+    annotations = None
+    if "annotations" in args.sink:
+        annotations = AnnotationSink(os.path.join(args.output, "annotations.jsonl"))
+    store = None
+    if args.results:
+        store = ResultStore(os.path.join(args.output, f"results.{args.results}"),
+                            fmt=args.results, chunk_size=args.results_chunk)
+
+    frames_done = 0
+    try:
+        with ShardedVideoRunner(workers, args.config) as runner:
+            for frame_index, frame_result in runner.run(segments, grabber_kwargs, args.output,
+                                                        args.sink, sink_kwargs):
+                if annotations is not None:
+                    annotations.write(frame_index, frame_result, None)
+                if store is not None:
+                    store.append(frame_result)
+                frames_done += 1
+    finally:
+        if annotations is not None:
+            annotations.close()
+        if store is not None:
+            store.close()
+
+    print(f"✅ Processed {frames_done} frames in {len(segments)} segments → {args.output}")
+
+def make_instrumentation(args):
+    """Return an Instrumentation dumping to --metrics_dump, or None when metrics are off."""
+    if not args.metrics_dump:
+        return None
+    from scr.utils.instrumentation import Instrumentation
+
+    return Instrumentation(dump_path=args.metrics_dump, dump_format=args.metrics_format,
+                           dump_interval=args.metrics_interval)
+
+def run_benchmark_mode(args):
+    from scr.utils.benchmark import (stub_stages, make_synthetic_video, run_benchmark,
+                                     write_report, print_report)
+    from scr.utils.pipeline_builder import build_pipeline
+    from scr.coreclasses.output.sinks import build_sink
+
+    os.makedirs(args.output, exist_ok=True)
+
+    video_path = args.input
+    if not video_path:
+        video_path = os.path.join(args.output, "benchmark_synthetic.avi")
+        make_synthetic_video(video_path, num_frames=args.bench_frames)
+        print(f"🎞️ Synthetic benchmark video: {video_path}")
+
+    stages = stub_stages(args.config, latency_ms=args.stub_latency_ms) if args.stub_models else None
+    pipeline = build_pipeline(args.config, stages=stages)
+
+    sink = build_sink(args.sink, args.output, jpeg_quality=args.jpeg_quality, scale=args.output_scale,
+                      async_writers=args.async_writers, queue_size=args.write_queue)
+
+    report = run_benchmark(
+        pipeline, video_path,
+        num_frames=args.bench_frames,
+        batch_size=args.batch_size,
+        sink=sink,
+        grabber_cls=grabber_class(args),
+        grabber_kwargs={"skip_frames": args.skip_frames, "skip_mode": args.skip_mode,
+                        "start_frame": args.start_frame, "queue_size": args.queue_size,
+                        "ring_buffer": args.ring_buffer, "memory_budget_mb": args.memory_budget_mb}
+    )
+    report["stub_models"] = args.stub_models
+    report["config"] = args.config
+
+    report_path = args.bench_report or os.path.join(args.output, "benchmark.json")
+    write_report(report, report_path)
+    print_report(report)
+    print(f"✅ Benchmark report saved to {report_path}")
+
+def validate_config(config_filename, configs_root="configs/"):
+    """Load and check the config without importing any model framework. Returns an exit code."""
+    from scr.coreclasses.config_loader import ConfigLoader
+
+    problems = ConfigLoader(config_filename, base_path=configs_root).validate()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print(f"✅ Config OK: {config_filename}")
+    return 1 if problems else 0
 
 def load_run_settings(path="scr/configs/run_settings.yaml"):
     if not os.path.exists(path):
@@ -48,38 +416,218 @@ def load_run_settings(path="scr/configs/run_settings.yaml"):
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
-# --- Future scaffold: Folder mode ---
-# def run_folder_mode(pipeline, input_folder, output_folder):
-#     os.makedirs(output_folder, exist_ok=True)
-#     for filename in os.listdir(input_folder):
-#         if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-#             input_path = os.path.join(input_folder, filename)
-#             output_path = os.path.join(output_folder, filename)
-#             run_image_mode(pipeline, input_path, output_path)
-
-# --- Future scaffold: Stream mode ---
-# def run_stream_mode(pipeline, stream_source=0):
-#     cap = cv2.VideoCapture(stream_source)
-#     while True:
-#         ret, frame = cap.read()
-#         if not ret:
-#             break
-#         results, visual_img = pipeline.process(frame)
-#         cv2.imshow("Live Stream", visual_img)
-#         if cv2.waitKey(1) & 0xFF == ord('q'):
-#             break
-#     cap.release()
-#     cv2.destroyAllWindows()
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def run_folder_mode(pipeline, args):
+    """
+    Process every image in a folder. Files are read, hashed and decoded in a
+    thread pool ahead of the pipeline, which runs them in batches. Results
+    are cached by content hash + config hash, so a re-run only processes new
+    or changed files. One JSON line per image goes to results.jsonl, in
+    sorted file order whichever images came from the cache.
+    Tracking and the motion gate are off: they only make sense for frame
+    sequences.
+    """
+    import json
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    import cv2
+    import numpy as np
+    from scr.coreclasses.output.sinks import to_jsonable
+    from scr.coreclasses.processing.result_cache import ResultCache, content_hash
+
+    os.makedirs(args.output, exist_ok=True)
+    # Images are unrelated: no track or motion reference may carry over from one to
+    # the next (results would depend on file order, and get cached)
+    pipeline.tracker = None
+    pipeline.motion_gate = None
+
+    names = sorted(f for f in os.listdir(args.input) if f.lower().endswith(IMAGE_EXTENSIONS))
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir or os.path.join(args.output, ".result_cache"), pipeline.config_hash)
+
+    def load(name):
+        with open(os.path.join(args.input, name), "rb") as f:
+            data = f.read()
+        key = content_hash(data)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            return name, key, None, cached
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        return name, key, image, None
+
+    def prefetched(pool):
+        # Bounded look-ahead so a huge folder is never decoded all at once
+        window = max(1, args.io_workers) * max(1, args.batch_size) * 2
+        pending = deque()
+        for name in names:
+            pending.append(pool.submit(load, name))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    counts = {"processed": 0, "cached": 0, "failed": 0}
+    jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(args.jpeg_quality)]
+    writes = []
+
+    with ThreadPoolExecutor(max_workers=max(1, args.io_workers)) as pool, \
+            open(os.path.join(args.output, "results.jsonl"), "w", encoding="utf-8") as results_file:
+
+        # Cached images are ready before the batch holding earlier files is flushed:
+        # hold records back until every file before them has one (None = failed)
+        order = deque()
+        ready = {}
+
+        def finish(name, line):
+            ready[name] = line
+            while order and order[0] in ready:
+                line = ready.pop(order.popleft())
+                if line is not None:
+                    results_file.write(json.dumps(line) + "\n")
+
+        def write_record(name, key, record, cached):
+            finish(name, {"file": name, "content_hash": key, "cached": cached, "results": record})
+
+        def flush(batch):
+            outputs = pipeline.process_batch([image for _, _, image in batch])
+            for (name, key, _), (frame_result, visual_img) in zip(batch, outputs):
+                record = to_jsonable(frame_result)
+                out_path = os.path.join(args.output, f"processed_{name}")
+                writes.append(pool.submit(cv2.imwrite, out_path, visual_img, jpeg_params))
+                if cache is not None:
+                    cache.put(key, record)
+                write_record(name, key, record, cached=False)
+                counts["processed"] += 1
+            batch.clear()
+
+        batch = []
+        for name, key, image, cached in prefetched(pool):
+            order.append(name)
+            if cached is not None:
+                write_record(name, key, cached, cached=True)
+                counts["cached"] += 1
+            elif image is None:
+                print(f"❌ Failed to decode image: {name}")
+                counts["failed"] += 1
+                finish(name, None)
+            else:
+                batch.append((name, key, image))
+                if len(batch) >= args.batch_size:
+                    flush(batch)
+        if batch:
+            flush(batch)
+
+        for write in writes:
+            write.result()
+    pipeline.publish_stats()
+
+    print(f"✅ {len(names)} images: {counts['processed']} processed, {counts['cached']} cached, "
+          f"{counts['failed']} failed → {args.output}")
+
+def run_stream_mode(pipeline, args):
+    """
+    Process a live source (camera index, stream URL) favouring freshness:
+    the grabber keeps only the newest batches and drops the rest. A local
+    video file is replayed at its native FPS so it behaves like a camera.
+    """
+    from scr.coreclasses.output.sinks import build_sink
+    from scr.coreclasses.processing.result_store import ResultStore
+    from scr.utils.instrumentation import Instrumentation, percentiles_ms
+
+    os.makedirs(args.output, exist_ok=True)
+    source = int(args.input) if args.input.isdigit() else args.input
+    metrics = make_instrumentation(args) or Instrumentation()
+    pipeline.set_instrumentation(metrics)
+
+    grabber = grabber_class(args)(
+        video_path=source,
+        skip_frames=args.skip_frames,
+        max_frames=args.max_frames,
+        start_frame=args.start_frame,
+        batch_size=args.batch_size,
+        queue_size=args.stream_queue,
+        skip_mode="grab",  # live sources cannot seek
+        drop_policy=args.drop_policy,
+        realtime=isinstance(source, str) and os.path.isfile(source),
+        ring_buffer=args.ring_buffer,
+        memory_budget_mb=args.memory_budget_mb,
+        metrics=metrics
+    )
+
+    grabber.open()
+    sink = build_sink(
+        args.sink,
+        args.output,
+        jpeg_quality=args.jpeg_quality,
+        scale=args.output_scale,
+        video_fps=args.video_fps or grabber.output_fps() or 25.0,
+        async_writers=args.async_writers,
+        queue_size=args.write_queue
+    )
+
+    store = None
+    if args.results:
+        store = ResultStore(os.path.join(args.output, f"results.{args.results}"),
+                            fmt=args.results, chunk_size=args.results_chunk)
+
+    frames_done = 0
+    try:
+        for frame_batch in grabber:
+            indices = list(grabber.batch_frame_indices)
+            outputs = pipeline.process_batch(
+                frame_batch,
+                frame_indices=indices,
+                timestamps=[grabber.timestamp_of(i) for i in indices],
+                capture_times=list(grabber.batch_capture_times)
+            )
+            for frame_index, (frame_result, visual_img) in zip(indices, outputs):
+                if args.async_writers:
+                    visual_img = grabber.retain(visual_img)
+                sink.write(frame_index, frame_result, visual_img)
+                if store is not None:
+                    store.append(frame_result)
+                metrics.record('e2e_latency', time.time() - frame_result.meta['captured_at'])
+                frames_done += 1
+            metrics.maybe_dump()
+    except KeyboardInterrupt:
+        print("⏹️ Stream stopped")
+    finally:
+        grabber.close()
+        sink.close()
+        if store is not None:
+            store.close()
+        pipeline.publish_stats()
+        if args.metrics_dump:
+            metrics.emit()
+
+    latency = percentiles_ms(list(metrics.samples.get('e2e_latency', [])))
+    print(f"✅ Processed {frames_done} frames, dropped {grabber.frames_dropped} → {args.output}")
+    if frames_done:
+        print(f"⏱️ End-to-end latency p50={latency['p50_ms']:.1f}ms "
+              f"p99={latency['p99_ms']:.1f}ms max={latency['max_ms']:.1f}ms")
 
 def main():
     parser = argparse.ArgumentParser(description="Face Emotion Detection CLI")
 
-    parser.add_argument('--mode', choices=['image', 'video'], default='image',
-                        help="Mode: image or video")
+    parser.add_argument('--mode', choices=['image', 'folder', 'video', 'stream'], default='image',
+                        help="Mode: image, folder of images, video or stream (live source, newest frames win)")
 
-    parser.add_argument('--input', required=True, help="Input file (image or video)")
+    parser.add_argument('--input', help="Input file (image or video), image folder, camera index or stream URL")
     parser.add_argument('--output', default="test_output/", help="Output folder or file")
     parser.add_argument('--config', default="config_default.yaml", help="Config file inside configs/main/")
+    parser.add_argument('--validate_config', action='store_true',
+                        help="Check the config and exit (no models are imported)")
+    parser.add_argument('--startup_time', action='store_true',
+                        help="Print CLI import/parse time and pipeline build time")
+    parser.add_argument('--log_level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        help="Logging level (DEBUG shows per-box filter/dedup decisions)")
+    parser.add_argument('--metrics_dump', default=None,
+                        help="Periodically write pipeline metrics to this file (video mode)")
+    parser.add_argument('--metrics_format', choices=['json', 'prometheus'], default='json',
+                        help="Format of the metrics dump")
+    parser.add_argument('--metrics_interval', type=float, default=10.0, help="Seconds between metrics dumps")
 
     # Video frame grabber parameters
     parser.add_argument('--skip_frames', type=int, default=0, help="Skip N frames after each frame")
@@ -88,6 +636,56 @@ def main():
     parser.add_argument('--start_frame', type=int, default=0, help="Start from frame number")
     parser.add_argument('--max_frames', type=int, default=None, help="Limit total frames processed")
     parser.add_argument('--queue_size', type=int, default=32, help="Prefetch queue size")
+    parser.add_argument('--skip_mode', choices=['read', 'grab', 'seek', 'auto'], default='auto',
+                        help="How skipped frames are consumed (auto: grab short skips, seek long ones)")
+    parser.add_argument('--seek_threshold', type=int, default=30, help="Skips of at least N frames seek in auto mode")
+    parser.add_argument('--target_fps', type=float, default=None, help="Sample frames at this rate instead of skip counts")
+    parser.add_argument('--sample_interval', type=float, default=None, help="Sample one frame every N seconds")
+    parser.add_argument('--ring_buffer', action='store_true',
+                        help="Decode into preallocated frame slots instead of allocating per frame")
+    parser.add_argument('--memory_budget_mb', type=float, default=None,
+                        help="Size the frame ring by memory (implies --ring_buffer)")
+    parser.add_argument('--decode_process', action='store_true',
+                        help="Decode in a child process, passing frames through shared memory")
+
+    # Output sinks (video mode)
+    parser.add_argument('--sink', nargs='+', choices=SINK_KINDS, default=['jpeg'],
+                        help="Outputs: per-frame JPEGs, one annotated video, and/or annotations JSONL")
+    parser.add_argument('--jpeg_quality', type=int, default=90, help="JPEG quality (0-100)")
+    parser.add_argument('--output_scale', type=float, default=1.0, help="Downscale factor for written frames")
+    parser.add_argument('--video_fps', type=float, default=None, help="FPS of the annotated video (default: sampled rate)")
+    parser.add_argument('--async_writers', type=int, default=1, help="Background writer threads per sink (0 = synchronous)")
+    parser.add_argument('--write_queue', type=int, default=64, help="Max frames waiting to be written")
+    parser.add_argument('--results', choices=STORE_FORMATS, default=None,
+                        help="Stream per-detection columns to results.jsonl or chunked results_*.npz")
+    parser.add_argument('--results_chunk', type=int, default=4096, help="Detections buffered per results chunk")
+
+    # Parallel execution (video mode)
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes, each with its own pipeline")
+    parser.add_argument('--max_in_flight', type=int, default=None,
+                        help="Max batches queued to workers (default 2 x workers)")
+    parser.add_argument('--sharded', action='store_true',
+                        help="Split the video into keyframe-aligned segments processed by --workers processes")
+    parser.add_argument('--segments', type=int, default=None, help="Segments in sharded mode (default 4 x workers)")
+    parser.add_argument('--index_path', default=None,
+                        help="Video index cache for sharded mode (default: <output>/<input name>.index.json)")
+
+    # Adaptive sampling (video mode)
+    parser.add_argument('--adaptive_fps', type=float, default=None,
+                        help="Source frames per second to keep up with; the skip rate follows the measured cost")
+    parser.add_argument('--latency_budget_ms', type=float, default=None,
+                        help="Max processing time per frame; above it full analysis drops to emotion only")
+    parser.add_argument('--max_skip', type=int, default=30, help="Upper bound of the adaptive skip")
+    parser.add_argument('--quiet_skip', type=int, default=0,
+                        help="Skip at least N frames while the scene is quiet (enables adaptive sampling)")
+
+    # Checkpointing (video mode)
+    parser.add_argument('--checkpoint_interval', type=float, default=None,
+                        help="Seconds between job journal checkpoints in <output>/job_journal.json "
+                             f"(default: off, {DEFAULT_CHECKPOINT_INTERVAL:.0f} with --resume); "
+                             "the video sink starts a new part file at each checkpoint")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted video job from its last checkpoint, appending to its outputs")
 
 
     # --- Future flags ---
@@ -95,14 +693,51 @@ def main():
     # parser.add_argument('--save_faces', action='store_true', help="Save cropped face images")
     # parser.add_argument('--skip', type=int, default=0, help="Frame skip interval (video)")
     # parser.add_argument('--max_frames', type=int, default=0, help="Limit frames processed")
-    # --- Future flags scaffold ---
-    # parser.add_argument('--stream_url', help="Stream source for live mode")
-    # parser.add_argument('--benchmark', action='store_true', help="Run inference benchmark mode")
+
+    # Folder mode
+    parser.add_argument('--io_workers', type=int, default=4, help="Threads reading/decoding/writing images")
+    parser.add_argument('--cache_dir', default=None, help="Result cache location (default: <output>/.result_cache)")
+    parser.add_argument('--no_cache', action='store_true', help="Process every image, ignoring cached results")
+
+    # Stream mode
+    parser.add_argument('--drop_policy', choices=['latest', 'block'], default='latest',
+                        help="latest: drop stale batches when inference falls behind; block: process every frame")
+    parser.add_argument('--stream_queue', type=int, default=1, help="Batches buffered in stream mode")
+
+    # Benchmark
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Benchmark the pipeline on --input (or a synthetic video) and write a JSON report")
+    parser.add_argument('--bench_frames', type=int, default=300, help="Frames to process in benchmark mode")
+    parser.add_argument('--bench_report', default=None, help="Report path (default: <output>/benchmark.json)")
+    parser.add_argument('--stub_models', action='store_true',
+                        help="Benchmark with stub detectors/analyzer (no weights or network needed)")
+    parser.add_argument('--stub_latency_ms', type=float, default=0.0, help="Simulated per-image model latency for stubs")
 
     args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(message)s")
+    if args.startup_time:
+        print(f"⏱️ CLI ready in {(time.perf_counter() - _CLI_START) * 1000:.0f} ms (imports + argument parsing)")
 
-    # Build pipeline from config
-    pipeline = build_pipeline(args.config)
+    if args.validate_config:
+        raise SystemExit(validate_config(args.config))
+    if args.benchmark:
+        run_benchmark_mode(args)
+        return
+    if not args.input:
+        parser.error("--input is required")
+    if args.sharded and args.workers < 2:
+        parser.error("--sharded needs --workers N (N >= 2); each worker loads its own full model set")
+    if (args.adaptive_fps or args.latency_budget_ms or args.quiet_skip) and (args.target_fps or args.sample_interval):
+        parser.error("adaptive sampling replaces --target_fps / --sample_interval; use one or the other")
+
+    # Build pipeline from config (workers build their own in parallel video mode)
+    pipeline = None
+    if not (args.mode == "video" and (args.workers > 1 or args.sharded)):
+        build_start = time.perf_counter()
+        from scr.utils.pipeline_builder import build_pipeline
+        pipeline = build_pipeline(args.config)
+        if args.startup_time:
+            print(f"⏱️ Pipeline built in {time.perf_counter() - build_start:.2f} s")
 
     if args.mode == "image":
         input_filename = os.path.basename(args.input)
@@ -112,8 +747,19 @@ def main():
 
         run_image_mode(pipeline, args.input, output_path)
 
+    elif args.mode == "folder":
+        run_folder_mode(pipeline, args)
+
+    elif args.mode == "video" and args.sharded:
+        if args.resume:
+            print("⚠️ --resume is not supported with --sharded; processing every segment")
+        run_sharded_video_mode(args)
+
     elif args.mode == "video":
         run_video_mode(pipeline, args)
 
+    elif args.mode == "stream":
+        run_stream_mode(pipeline, args)
+
 if __name__ == "__main__":
     main()
@@ -1,8 +1,13 @@
 # coreclasses/config_loader.py
 
+import hashlib
+import json
 import yaml
 import os
 
+FACE_SEARCH_MODES = ("full", "cascade")
+YOLO_BACKENDS = ("ultralytics", "onnxruntime")
+
 class ConfigLoader:
 
     def __init__(self, main_config_path, base_path="configs/"):
@@ -18,7 +23,7 @@ class ConfigLoader:
     def _load_yaml(self, path):
         try:
             with open(path, "r") as f:
-                return yaml.safe_load(f)
+                return yaml.safe_load(f) or {}
         except Exception as e:
             print(f"⚠️ Failed to load YAML from {path}: {e}")
             return {}
@@ -32,6 +37,10 @@ class ConfigLoader:
         cfg['post_crop_filter'] = self.main_cfg.get("post_crop_filter", {})
         cfg['detector_filter'] = self.main_cfg.get("detector_filter", {})
         cfg['model_selection'] = self.main_cfg.get("model_selection", {})
+        cfg['tracking'] = self.main_cfg.get("tracking", {})
+        cfg['motion_gate'] = self.main_cfg.get("motion_gate", {})
+        cfg['detection_resolution'] = self.main_cfg.get("detection_resolution", {})
+        cfg['analysis_cache'] = self.main_cfg.get("analysis_cache", {})
 
         # Deduplication handling (resolve presets + overrides)
         dedup = self.main_cfg.get("deduplication", {})
@@ -50,9 +59,22 @@ class ConfigLoader:
         # Resolved model paths from models config
         model_sel = cfg['model_selection']
 
-        # Resolve person_detector_model → yolo model file path
+        # Resolve person_detector_model → yolo model file path + backend
+        # (entries are a plain path, or a mapping with path/backend/options)
         person_key = model_sel.get("person_detector_model", "default")
-        cfg['person_model_path'] = self.model_cfg.get('yolo_models', {}).get(person_key, "")
+        person_entry = self.model_cfg.get('yolo_models', {}).get(person_key, "")
+        if isinstance(person_entry, dict):
+            person_entry = dict(person_entry)
+            cfg['person_model_path'] = person_entry.pop('path', "")
+            cfg['person_model_backend'] = person_entry.pop('backend', None)
+            cfg['person_model_options'] = person_entry
+        else:
+            cfg['person_model_path'] = person_entry
+            cfg['person_model_backend'] = None
+            cfg['person_model_options'] = {}
+        if cfg['person_model_backend'] is None:
+            is_onnx = str(cfg['person_model_path']).lower().endswith(".onnx")
+            cfg['person_model_backend'] = "onnxruntime" if is_onnx else "ultralytics"
 
         # Resolve backend (string, not file)
         backend_key = model_sel.get("face_detector_backend", "default")
@@ -62,3 +84,42 @@ class ConfigLoader:
 
     def get(self):
         return self.config
+
+    def config_hash(self):
+        """Short stable hash of the merged config; changes whenever any setting does."""
+        text = json.dumps(self.config, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def validate(self):
+        """Return a list of problems found in the merged config (empty if valid)."""
+        problems = []
+        cfg = self.config
+        pipeline = cfg['pipeline']
+
+        if not self.main_cfg:
+            problems.append(f"main config is missing or empty: {os.path.join(self.base_path, 'main', self.main_config_path)}")
+
+        detect_persons = pipeline.get('detect_persons', True)
+        if detect_persons and not cfg['person_model_path']:
+            key = cfg['model_selection'].get('person_detector_model', 'default')
+            problems.append(f"no YOLO model configured for person_detector_model '{key}'")
+        if detect_persons and cfg['person_model_backend'] not in YOLO_BACKENDS:
+            problems.append(f"YOLO backend must be one of {YOLO_BACKENDS}, got '{cfg['person_model_backend']}'")
+
+        face_search = pipeline.get('face_search', 'full')
+        if face_search not in FACE_SEARCH_MODES:
+            problems.append(f"pipeline.face_search must be one of {FACE_SEARCH_MODES}, got '{face_search}'")
+        elif face_search == 'cascade' and not detect_persons:
+            problems.append("pipeline.face_search 'cascade' requires pipeline.detect_persons")
+
+        presets = self.dedup_cfg.get('presets', {})
+        for target in ["face", "person"]:
+            preset_name = self.main_cfg.get("deduplication", {}).get(f"{target}_preset", "default")
+            if preset_name not in presets:
+                problems.append(f"unknown deduplication preset '{preset_name}' for {target}")
+
+        for key, value in cfg['deduplication'].items():
+            if not isinstance(value, (int, float)):
+                problems.append(f"deduplication.{key} must be a number, got {value!r}")
+
+        return problems
@@ -0,0 +1,6 @@
+# scr/coreclasses/detectors/attribute_labels.py
+
+# Label order of the DeepFace attribute model outputs
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+GENDER_LABELS = ["Woman", "Man"]
+RACE_LABELS = ["asian", "indian", "black", "white", "middle eastern", "latino hispanic"]
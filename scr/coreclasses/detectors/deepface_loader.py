@@ -0,0 +1,15 @@
+# scr/coreclasses/detectors/deepface_loader.py
+
+# ========================================
+# DeepFace loader (deferred import, pulls in TensorFlow)
+# ========================================
+_DeepFace = None
+
+
+def import_deepface():
+    """Import DeepFace on first use (when a stage needing it is created); later calls are free."""
+    global _DeepFace
+    if _DeepFace is None:
+        from deepface import DeepFace
+        _DeepFace = DeepFace
+    return _DeepFace
@@ -3,13 +3,22 @@
 # ========================================
 # Face Detector (DeepFace + hybrid dedup)
 # ========================================
-from deepface import DeepFace
+import logging
+import numpy as np
+from scr.coreclasses.detectors.deepface_loader import import_deepface
 from scr.coreclasses.filtering.boxdeduplicator import BoxDeduplicator
+from scr.coreclasses.managers.modelmanager import ModelRegistry
+from scr.utils.instrumentation import NULL_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
 
 class FaceDetector:
     def __init__(self, backend="opencv", min_face_size=40, max_face_size=1024,
                  min_aspect_ratio=0.5, max_aspect_ratio=2.0,
                  iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0):
+        import_deepface()
+
         self.backend = backend
         self.min_face_size = min_face_size
         self.max_face_size = max_face_size
@@ -17,46 +26,103 @@ class FaceDetector:
         self.max_aspect_ratio = max_aspect_ratio
 
         self.deduplicator = BoxDeduplicator(iou_threshold, overlap_threshold, size_ratio_threshold)
+        self.metrics = NULL_INSTRUMENTATION
+
+    def warm_up(self, size=320):
+        """Make DeepFace load the detector backend before the first real frame."""
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+        ModelRegistry.warm_up((f"detector:{self.backend}", "deepface"), lambda: self._extract_boxes(dummy))
+
+    def detect_faces(self, image, scale=1.0):
+        """
+        image: frame, or a copy resized by `scale` (size filters are scaled
+               to match, so they still apply in original-frame pixels)
+        returns: boxes in `image` coordinates
+        """
+        raw_boxes = self._extract_boxes(image)
+        return self._filter_and_deduplicate(raw_boxes, scale)
+
+    def detect_faces_in_regions(self, image, regions, scale=1.0):
+        """
+        Cascade mode: run the face detector only inside `regions`
+        (x1, y1, x2, y2 in `image` coordinates, e.g. expanded person boxes).
+        Returned boxes are in `image` coordinates, deduplicated across regions.
+        Regions are scanned one call each: DeepFace's detectors take a single
+        image per call (a list input is looped over internally).
+        """
+        raw_boxes = []
+        for (rx1, ry1, rx2, ry2) in self._drop_contained(regions):
+            if rx2 <= rx1 or ry2 <= ry1:
+                continue
+            crop = image[ry1:ry2, rx1:rx2]
+            for (x1, y1, x2, y2) in self._extract_boxes(crop):
+                raw_boxes.append((x1 + rx1, y1 + ry1, x2 + rx1, y2 + ry1))
+        return self._filter_and_deduplicate(raw_boxes, scale)
 
-    def detect_faces(self, image):
-        detections = DeepFace.extract_faces(
+    def _extract_boxes(self, image):
+        detections = import_deepface().extract_faces(
             img_path=image,
             detector_backend=self.backend,
             enforce_detection=False,
             align=False
         )
 
-        raw_boxes = []
+        boxes = []
         h, w = image.shape[:2]
         for face in detections:
             region = face['facial_area']
+            # enforce_detection=False reports "no face" as the whole input with confidence 0;
+            # a real face filling a tight crop (cascade mode) has a confidence
+            whole_input = region['x'] <= 0 and region['y'] <= 0 and region['w'] >= w and region['h'] >= h
+            if whole_input and not face.get('confidence'):
+                continue
             x1 = max(0, int(region['x']))
             y1 = max(0, int(region['y']))
             x2 = min(int(region['x'] + region['w']), w)
             y2 = min(int(region['y'] + region['h']), h)
+            boxes.append((x1, y1, x2, y2))
+        return boxes
+
+    def _filter_and_deduplicate(self, boxes, scale=1.0):
+        min_size = self.min_face_size * scale
+        max_size = self.max_face_size * scale
 
+        raw_boxes = []
+        for (x1, y1, x2, y2) in boxes:
             box_w = x2 - x1
             box_h = y2 - y1
             aspect_ratio = box_w / box_h if box_h > 0 else 0
 
-            if (self.min_face_size <= box_w <= self.max_face_size and
-                self.min_face_size <= box_h <= self.max_face_size and
+            if (min_size <= box_w <= max_size and
+                min_size <= box_h <= max_size and
                 self.min_aspect_ratio <= aspect_ratio <= self.max_aspect_ratio):
                 raw_boxes.append(((x1, y1, x2, y2), box_w * box_h))
             else:
-                print(f"⚠️ Skipped face box: size={box_w}x{box_h}, aspect={aspect_ratio:.2f}")
+                logger.debug("⚠️ Skipped face box: size=%dx%d, aspect=%.2f", box_w, box_h, aspect_ratio)
 
-        raw_boxes.sort(key=lambda b: b[1])  # smallest area first
+        # Visited smallest area first
+        with self.metrics.stage('dedup'):
+            keep = self.deduplicator.keep_indices([box for box, _ in raw_boxes])
+        filtered = len(boxes) - len(raw_boxes)
+        rejected = len(raw_boxes) - len(keep)
+        if filtered:
+            self.metrics.count('face_boxes_filtered', filtered)
+        if rejected:
+            self.metrics.count('face_duplicates_rejected', rejected)
+            logger.debug("⚠️ %d face duplicate(s) skipped by hybrid check", rejected)
 
-        boxes = []
-        for (x1, y1, x2, y2), _ in raw_boxes:
-            duplicate = False
-            for prev_box in boxes:
-                if self.deduplicator.is_duplicate((x1, y1, x2, y2), prev_box):
-                    duplicate = True
-                    print("⚠️ Face duplicate skipped by hybrid check")
-                    break
-            if not duplicate:
-                boxes.append((x1, y1, x2, y2))
+        return [raw_boxes[i][0] for i in keep]
 
-        return boxes
+    @staticmethod
+    def _drop_contained(regions):
+        """Skip regions lying entirely inside another region (no need to scan twice)."""
+        regions = list(dict.fromkeys(tuple(r) for r in regions))
+        kept = []
+        for i, (x1, y1, x2, y2) in enumerate(regions):
+            inside = any(
+                j != i and ox1 <= x1 and oy1 <= y1 and x2 <= ox2 and y2 <= oy2
+                for j, (ox1, oy1, ox2, oy2) in enumerate(regions)
+            )
+            if not inside:
+                kept.append((x1, y1, x2, y2))
+        return kept
@@ -2,49 +2,85 @@
 # ========================================
 # Object Detector (YOLO person detector)
 # ========================================
+import logging
 import numpy as np
 import cv2
-from ultralytics import YOLO
-from scr.coreclasses.managers.modelmanager import ModelManager
+from scr.coreclasses.managers.modelmanager import ModelManager, ModelRegistry
 from scr.coreclasses.filtering.boxdeduplicator import BoxDeduplicator
+from scr.utils.instrumentation import NULL_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+YOLO = None  # imported when the first detector is created (pulls in PyTorch)
+
+
+def _import_yolo():
+    global YOLO
+    if YOLO is None:
+        from ultralytics import YOLO as _YOLO
+        YOLO = _YOLO
+    return YOLO
 
 class ObjectDetector:
     def __init__(self, model_path="yolov8n.pt", device="cpu", confidence=0.3,
                  iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0):
+        self._import_backend()
+
         self.model_path = model_path
         self.device = device
         self.confidence = confidence
 
         self.deduplicator = BoxDeduplicator(iou_threshold, overlap_threshold, size_ratio_threshold)
+        self.metrics = NULL_INSTRUMENTATION
 
-        model_manager = ModelManager("models")
-        resolved_path = model_manager.load_model(self.model_path)
+        self.resolved_path = self._resolve_path(self.model_path)
+        self._model = None
 
-        self.model = YOLO(resolved_path)
-        self.model.to(self.device)
+    def _import_backend(self):
+        _import_yolo()
 
-        self.class_names = self.model.names if hasattr(self.model, 'names') else None
+    def _resolve_path(self, model_path):
+        return ModelManager("models").load_model(model_path)
+
+    @property
+    def model(self):
+        """YOLO model, loaded on first use and shared process-wide per (path, device)."""
+        if self._model is None:
+            self._model = ModelRegistry.get((self.resolved_path, self.device), self._load_model)
+        return self._model
+
+    @property
+    def class_names(self):
+        return self.model.names if hasattr(self.model, 'names') else None
+
+    def _load_model(self):
+        model = YOLO(self.resolved_path)
+        model.to(self.device)
+        return model
+
+    def warm_up(self, size=640):
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+        ModelRegistry.warm_up((self.resolved_path, self.device),
+                              lambda: self.model([dummy], verbose=False, device=self.device))
 
     def infer(self, inputs, slack=0.0, draw_boxes=False, allowed_classes=None):
         if not isinstance(inputs, list):
             inputs = [inputs]
 
-        results = self.model(inputs, verbose=False, device=self.device)
+        images = [self._load_image(item) for item in inputs]
+        class_names = self.class_names
         detections = []
 
-        for idx, r in enumerate(results):
-            img = self._load_image(inputs[idx])
+        for idx, (boxes, confs, clss) in enumerate(self._predict(images)):
+            img = images[idx]
             img_h, img_w = img.shape[:2]
-            boxes = r.boxes.xyxy.cpu().numpy()
-            confs = r.boxes.conf.cpu().numpy()
-            clss = r.boxes.cls.cpu().numpy()
 
             raw_boxes = []
             for box, conf, cls_id in zip(boxes, confs, clss):
                 if conf < self.confidence:
                     continue
 
-                class_name = self.class_names[int(cls_id)] if self.class_names else str(cls_id)
+                class_name = class_names[int(cls_id)] if class_names else str(cls_id)
                 if allowed_classes and class_name not in allowed_classes:
                     continue
 
@@ -67,18 +103,24 @@ class ObjectDetector:
 
         return detections
 
+    def _predict(self, images):
+        """Run the model on a list of BGR images. Returns per-image (xyxy, confidences, class ids) arrays."""
+        results = self.model(images, verbose=False, device=self.device)
+        return [(r.boxes.xyxy.cpu().numpy(), r.boxes.conf.cpu().numpy(), r.boxes.cls.cpu().numpy())
+                for r in results]
+
     def _deduplicate(self, detections):
-        filtered = []
-        for det in sorted(detections, key=lambda d: -d['confidence']):
-            duplicate = False
-            for prev in filtered:
-                if self.deduplicator.is_duplicate(det['box'], prev['box']):
-                    duplicate = True
-                    print("⚠️ Object duplicate skipped by hybrid check")
-                    break
-            if not duplicate:
-                filtered.append(det)
-        return filtered
+        # Visited highest confidence first
+        with self.metrics.stage('dedup'):
+            keep = self.deduplicator.keep_indices(
+                [det['box'] for det in detections],
+                scores=[det['confidence'] for det in detections]
+            )
+        rejected = len(detections) - len(keep)
+        if rejected:
+            self.metrics.count('object_duplicates_rejected', rejected)
+            logger.debug("⚠️ %d object duplicate(s) skipped by hybrid check", rejected)
+        return [detections[i] for i in keep]
 
     def _load_image(self, img_input):
         if isinstance(img_input, np.ndarray):
@@ -0,0 +1,182 @@
+# scr/coreclasses/detectors/onnx_objectdetector.py
+# ========================================
+# Object Detector (YOLO on ONNX Runtime, CPU)
+# ========================================
+import ast
+import os
+import numpy as np
+import cv2
+from scr.coreclasses.detectors.objectdetector import ObjectDetector
+from scr.coreclasses.managers.modelmanager import ModelManager, ModelRegistry
+
+ort = None  # imported when the first detector is created
+
+
+def _import_onnxruntime():
+    global ort
+    if ort is None:
+        import onnxruntime as _ort
+        ort = _ort
+    return ort
+
+# Fallback when the exported model carries no 'names' metadata
+COCO_CLASS_NAMES = (
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat", "traffic light",
+    "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog", "horse", "sheep", "cow",
+    "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella", "handbag", "tie", "suitcase", "frisbee",
+    "skis", "snowboard", "sports ball", "kite", "baseball bat", "baseball glove", "skateboard", "surfboard",
+    "tennis racket", "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple",
+    "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch",
+    "potted plant", "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard",
+    "cell phone", "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase",
+    "scissors", "teddy bear", "hair drier", "toothbrush",
+)
+
+MAX_BOX_SIDE = 7680  # class offset for class-aware NMS in one pass
+
+
+def letterbox(image, size, out=None, pad_value=114):
+    """
+    Resize keeping aspect ratio and pad to size x size (written into `out` if given).
+    Returns (padded, scale, (pad_x, pad_y)).
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    if out is None:
+        out = np.empty((size, size, 3), dtype=np.uint8)
+    out[...] = pad_value
+    out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return out, scale, (pad_x, pad_y)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression on xyxy boxes. Returns kept indices, highest score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxObjectDetector(ObjectDetector):
+    """
+    ObjectDetector backed by an exported YOLOv8/11 ONNX model (FP32, FP16 or
+    INT8-quantized) on ONNX Runtime's CPU provider. Letterboxing and NMS run
+    in NumPy; infer() returns the same detection dicts as the ultralytics
+    backend. Models exported with dynamic=True run each batch in a single call.
+    """
+
+    def __init__(self, model_path="yolov8n.onnx", confidence=0.3, iou_threshold=0.3,
+                 overlap_threshold=0.7, size_ratio_threshold=2.0,
+                 input_size=640, nms_iou=0.7, max_detections=300, num_threads=0):
+        """
+        input_size: letterbox side for models with dynamic spatial dims
+        nms_iou: IoU threshold of the (class-aware) NMS on raw predictions
+        num_threads: ONNX Runtime intra-op threads (0 = runtime default)
+        """
+        self.input_size = input_size
+        self.nms_iou = nms_iou
+        self.max_detections = max_detections
+        self.num_threads = num_threads
+        self._class_names = None
+        super().__init__(model_path=model_path, device="cpu", confidence=confidence,
+                         iou_threshold=iou_threshold, overlap_threshold=overlap_threshold,
+                         size_ratio_threshold=size_ratio_threshold)
+
+    def _import_backend(self):
+        _import_onnxruntime()
+
+    def _resolve_path(self, model_path):
+        # ONNX files are exported locally, never downloaded
+        path = model_path if os.path.isabs(model_path) else os.path.join(ModelManager("models").model_dir, model_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ ONNX model not found: {path} "
+                                    f"(export it with: yolo export model=yolov8n.pt format=onnx dynamic=True)")
+        return path
+
+    def _load_model(self):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        return ort.InferenceSession(self.resolved_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    @property
+    def class_names(self):
+        if self._class_names is None:
+            names = self.model.get_modelmeta().custom_metadata_map.get("names")
+            try:
+                self._class_names = ast.literal_eval(names) if names else COCO_CLASS_NAMES
+            except (ValueError, SyntaxError):
+                self._class_names = COCO_CLASS_NAMES
+        return self._class_names
+
+    def warm_up(self, size=None):
+        dummy = np.zeros((size or self.input_size, size or self.input_size, 3), dtype=np.uint8)
+        ModelRegistry.warm_up((self.resolved_path, self.device), lambda: self._predict([dummy]))
+
+    def _predict(self, images):
+        session = self.model
+        model_input = session.get_inputs()[0]
+        batch_dim, _, height, width = model_input.shape
+        size = height if isinstance(height, int) and height == width else self.input_size
+        fixed_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+        step = fixed_batch or max(1, len(images))
+        dtype = np.float16 if model_input.type == "tensor(float16)" else np.float32
+
+        outputs = []
+        for start in range(0, len(images), step):
+            chunk = images[start:start + step]
+            canvas = np.empty((fixed_batch or len(chunk), size, size, 3), dtype=np.uint8)
+            canvas[len(chunk):] = 0  # unused slots of a fixed-size batch
+            transforms = [letterbox(img, size, out=canvas[i])[1:] for i, img in enumerate(chunk)]
+
+            # BGR HWC uint8 -> RGB CHW [0, 1]
+            blob = canvas[..., ::-1].transpose(0, 3, 1, 2).astype(dtype)
+            blob *= dtype(1 / 255)
+            preds = session.run(None, {model_input.name: np.ascontiguousarray(blob)})[0]
+
+            for img, pred, transform in zip(chunk, preds, transforms):
+                outputs.append(self._postprocess(pred, transform, img.shape[:2]))
+        return outputs
+
+    def _postprocess(self, pred, transform, image_shape):
+        """(4 + num_classes, anchors) raw output -> (xyxy, confidences, class ids) in image coordinates."""
+        pred = np.asarray(pred, dtype=np.float32)
+        if pred.shape[0] < pred.shape[1]:
+            pred = pred.T  # anchors first
+
+        scores = pred[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), class_ids]
+        mask = confs >= self.confidence
+        cxcywh, confs, class_ids = pred[mask, :4], confs[mask], class_ids[mask]
+
+        boxes = np.empty_like(cxcywh)
+        boxes[:, :2] = cxcywh[:, :2] - cxcywh[:, 2:] / 2
+        boxes[:, 2:] = cxcywh[:, :2] + cxcywh[:, 2:] / 2
+
+        keep = nms(boxes + class_ids[:, None] * MAX_BOX_SIDE, confs, self.nms_iou)[:self.max_detections]
+        boxes, confs, class_ids = boxes[keep], confs[keep], class_ids[keep]
+
+        # Undo the letterbox
+        scale, (pad_x, pad_y) = transform
+        img_h, img_w = image_shape
+        boxes -= (pad_x, pad_y, pad_x, pad_y)
+        boxes /= scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, img_w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, img_h)
+        valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])  # fully inside the padding
+        return boxes[valid], confs[valid], class_ids[valid].astype(np.float32)
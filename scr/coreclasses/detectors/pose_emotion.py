@@ -1,10 +1,19 @@
 # scr/coreclasses/detectors/pose_emotion.py
 
+import logging
 import cv2
-from deepface import DeepFace
+import numpy as np
+from scr.coreclasses.managers.modelmanager import ModelRegistry
+from scr.coreclasses.detectors.deepface_loader import import_deepface
+from scr.coreclasses.detectors.attribute_labels import EMOTION_LABELS, GENDER_LABELS, RACE_LABELS
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTE_INPUT_SIZE = 224
+EMOTION_INPUT_SIZE = 48
 
 class PoseAndEmotionAnalyzer:
-    def __init__(self, enforce_detection=False, detector_backend='opencv', preview=False, full_analysis=False, verification_threshold=0.4, enable_validation=False):
+    def __init__(self, enforce_detection=False, detector_backend='opencv', preview=False, full_analysis=False, verification_threshold=0.4, enable_validation=False, batch_size=32, pre_detected_crops=False):
         """
         enforce_detection: if True, DeepFace runs internal detection
         detector_backend: used if enforce_detection is True
@@ -12,13 +21,30 @@ class PoseAndEmotionAnalyzer:
         full_analysis: if True, run full DeepFace analysis (age, gender, emotion, race)
         verification_threshold: threshold for self-verification distance (lower = stricter)
         enable_validation: if True, perform self-verification before emotion analysis
+                           (a crop's distance to itself: it only rejects crops DeepFace
+                           cannot embed; ignored with pre_detected_crops)
+        batch_size: max crops per model forward pass in predict_emotion_batch
+        pre_detected_crops: if True, inputs are already-localized face crops;
+                            DeepFace skips its detector backend entirely
         """
+        import_deepface()
+
+        if pre_detected_crops:
+            enforce_detection = False
+            detector_backend = 'skip'
+            if enable_validation:
+                # FaceDetector already accepted the crop; an embedding per crop would add nothing
+                logger.info("ℹ️ Face validation is skipped for pre-detected crops")
+                enable_validation = False
+
         self.enforce_detection = enforce_detection
         self.detector_backend = detector_backend
+        self.pre_detected_crops = pre_detected_crops
         self.preview = preview
         self.full_analysis = full_analysis
         self.verification_threshold = verification_threshold
         self.enable_validation = enable_validation
+        self.batch_size = batch_size
         self.window_name = "Emotion Preview"
         self.window_opened = False
 
@@ -31,10 +57,10 @@ class PoseAndEmotionAnalyzer:
 
         if self.enable_validation:
             if not self.is_valid_face(face_img):
-                print("⚠️ Face validation failed. Skipping.")
+                logger.debug("⚠️ Face validation failed. Skipping.")
                 return None
 
-        result = DeepFace.analyze(
+        result = import_deepface().analyze(
             img_path=face_img,
             actions=['emotion', 'age', 'gender', 'race'] if self.full_analysis else ['emotion'],
             enforce_detection=self.enforce_detection,
@@ -54,6 +80,120 @@ class PoseAndEmotionAnalyzer:
         else:
             return result.get('dominant_emotion', 'unknown')
 
+    def predict_emotion_batch(self, face_imgs):
+        """
+        face_imgs: list of cropped face images (BGR)
+        returns: list aligned with face_imgs, each entry shaped like the
+                 predict_emotion output (or None if validation rejected it)
+
+        Crops are resized/normalized into one tensor and each attribute
+        model runs once per chunk of `batch_size` crops. Crops are consumed
+        as-is, without re-running the face detector.
+        """
+        outputs = [None] * len(face_imgs)
+
+        valid_idx = []
+        for idx, face_img in enumerate(face_imgs):
+            self._show_preview(face_img)
+            if face_img is None or face_img.size == 0:
+                continue
+            if self.enable_validation and not self.is_valid_face(face_img):
+                logger.debug("⚠️ Face validation failed. Skipping.")
+                continue
+            valid_idx.append(idx)
+
+        step = max(1, self.batch_size)
+        for start in range(0, len(valid_idx), step):
+            chunk = valid_idx[start:start + step]
+            batch = self._prepare_batch([face_imgs[i] for i in chunk])
+            for i, res in zip(chunk, self._analyze_batch(batch)):
+                outputs[i] = res
+
+        return outputs
+
+    def _prepare_batch(self, face_imgs):
+        """Letterbox crops to the attribute input size and scale to [0, 1]."""
+        size = ATTRIBUTE_INPUT_SIZE
+        batch = np.zeros((len(face_imgs), size, size, 3), dtype=np.uint8)
+        for i, img in enumerate(face_imgs):
+            h, w = img.shape[:2]
+            factor = min(size / h, size / w)
+            new_w, new_h = max(1, int(w * factor)), max(1, int(h * factor))
+            resized = cv2.resize(img, (new_w, new_h))
+            dy, dx = (size - new_h) // 2, (size - new_w) // 2
+            batch[i, dy:dy + new_h, dx:dx + new_w] = resized
+        return batch.astype(np.float32) / 255.0
+
+    def _analyze_batch(self, batch):
+        """Run each attribute model once over a prepared (N, 224, 224, 3) batch."""
+        n = batch.shape[0]
+
+        # Emotion model expects 48x48 grayscale (BGR luma weights)
+        gray = batch @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+        gray = np.stack([cv2.resize(g, (EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE)) for g in gray])
+        emotion_preds = self._run_model("Emotion", gray[..., np.newaxis])
+        emotion_scores = 100 * emotion_preds / emotion_preds.sum(axis=1, keepdims=True)
+
+        if self.full_analysis:
+            age_preds = self._run_model("Age", batch)
+            gender_preds = self._run_model("Gender", batch)
+            race_preds = self._run_model("Race", batch)
+
+            ages = age_preds @ np.arange(age_preds.shape[1], dtype=np.float32)
+            gender_scores = 100 * gender_preds
+            race_scores = 100 * race_preds / race_preds.sum(axis=1, keepdims=True)
+
+        results = []
+        for i in range(n):
+            dominant = EMOTION_LABELS[int(np.argmax(emotion_scores[i]))]
+            if not self.full_analysis:
+                results.append(dominant)
+                continue
+
+            results.append({
+                "dominant_emotion": dominant,
+                "emotion": dict(zip(EMOTION_LABELS, emotion_scores[i].tolist())),
+                "age": int(ages[i]),
+                "gender": dict(zip(GENDER_LABELS, gender_scores[i].tolist())),
+                "race": dict(zip(RACE_LABELS, race_scores[i].tolist()))
+            })
+        return results
+
+    def _run_model(self, name, batch):
+        model = self._get_attribute_model(name)
+        return np.asarray(model.predict_on_batch(batch))
+
+    def _get_attribute_model(self, name):
+        """Return the underlying Keras model of a DeepFace attribute client (shared process-wide)."""
+        return ModelRegistry.get((name, "deepface"), lambda: self._load_attribute_model(name))
+
+    @staticmethod
+    def _load_attribute_model(name):
+        try:
+            from deepface.modules import modeling
+            client = modeling.build_model(task="facial_attribute", model_name=name)
+        except (ImportError, TypeError):
+            # Older DeepFace releases expose build_model(model_name) only
+            client = import_deepface().build_model(name)
+        return getattr(client, "model", client)
+
+    def warm_up(self):
+        """Load and run every model this analyzer uses once on a dummy crop."""
+        dummy = np.zeros((64, 64, 3), dtype=np.uint8)
+        names = ["Emotion", "Age", "Gender", "Race"] if self.full_analysis else ["Emotion"]
+        for name in names:
+            self._get_attribute_model(name)
+
+        # Keyed by model set: an emotion-only warm-up never ran Age / Gender / Race
+        ModelRegistry.warm_up((f"attributes:{'+'.join(names)}", "deepface"),
+                              lambda: self._analyze_batch(self._prepare_batch([dummy])))
+        if not self.pre_detected_crops:
+            # DeepFace.analyze also loads the detector backend
+            ModelRegistry.warm_up((f"analyze:{self.detector_backend}", "deepface"), lambda: import_deepface().analyze(
+                img_path=dummy, actions=['emotion'], enforce_detection=False, detector_backend=self.detector_backend))
+        if self.enable_validation:
+            ModelRegistry.warm_up(("represent", "deepface"), lambda: self._represent(dummy))
+
     def is_valid_face(self, face_img):
         """
         Validates face using self-verification distance.
@@ -63,22 +203,35 @@ class PoseAndEmotionAnalyzer:
             distance = self._verify_face(face_img)
             return distance <= self.verification_threshold
         except Exception as e:
-            print(f"⚠️ Verification error: {e}")
+            logger.warning("⚠️ Verification error: %s", e)
             return False
 
     def _verify_face(self, face_img):
         """
         Internal method for self-verification.
         Returns distance score.
+
+        The crop is compared with itself, so the distance is ~0 for any crop
+        DeepFace can embed: the check is a no-op except for degenerate (zero or
+        NaN) embeddings, which fail it. The crop is embedded once and the
+        embedding is reused for both sides (DeepFace.verify embedded it twice).
         """
-        result = DeepFace.verify(
-            img1_path=face_img,
-            img2_path=face_img,
+        embedding = self._represent(face_img)
+        return self._cosine_distance(embedding, embedding)
+
+    def _represent(self, face_img):
+        result = import_deepface().represent(
+            img_path=face_img,
             detector_backend=self.detector_backend,
             enforce_detection=False
         )
-        distance = result['distance']
-        return distance
+        return np.asarray(result[0]['embedding'], dtype=np.float32)
+
+    @staticmethod
+    def _cosine_distance(a, b):
+        # Degenerate (zero / non-finite) embeddings give NaN and fail validation
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(1 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
     def _show_preview(self, img):
         if not self.preview:
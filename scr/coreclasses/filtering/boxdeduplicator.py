@@ -1,5 +1,10 @@
 # scr/coreclasses/filtering/BoxDeduplicator.py
 
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 class BoxDeduplicator:
     def __init__(self, iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0):
         self.iou_threshold = iou_threshold
@@ -12,11 +17,11 @@ class BoxDeduplicator:
         areaB = self._area(boxB)
         size_ratio = max(areaA, areaB) / min(areaA, areaB)
 
-        print(f"[Deduplicator] IOU: {iou_val:.3f} | Size ratio: {size_ratio:.2f}")
+        logger.debug("[Deduplicator] IOU: %.3f | Size ratio: %.2f", iou_val, size_ratio)
 
         if size_ratio > self.size_ratio_threshold:
             overlap_val = self._relative_overlap(boxA, boxB)
-            print(f"[Deduplicator] Relative overlap: {overlap_val:.3f}")
+            logger.debug("[Deduplicator] Relative overlap: %.3f", overlap_val)
             if overlap_val > self.overlap_threshold:
                 return True
         else:
@@ -24,6 +29,63 @@ class BoxDeduplicator:
                 return True
         return False
 
+    def keep_indices(self, boxes, scores=None):
+        """
+        Greedy hybrid deduplication over a whole set of boxes.
+
+        boxes: (N, 4) array-like of x1, y1, x2, y2
+        scores: optional (N,) array-like; boxes are visited by descending
+                score if given, otherwise by ascending area (stable order)
+        returns: list of kept indices in visiting order
+
+        Each visited box is dropped if is_duplicate(box, kept_box) would be
+        True for any already kept box.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if len(boxes) == 0:
+            return []
+
+        if scores is not None:
+            order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+        else:
+            order = np.argsort(self._areas(boxes), kind="stable")
+
+        duplicates = self.duplicate_matrix(boxes)
+
+        kept = []
+        for idx in order:
+            if not duplicates[idx, kept].any():
+                kept.append(int(idx))
+        return kept
+
+    def duplicate_matrix(self, boxes):
+        """Return an (N, N) bool matrix where [a, b] == is_duplicate(boxes[a], boxes[b])."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        areas = self._areas(boxes)
+
+        iw = np.minimum(boxes[:, None, 2], boxes[None, :, 2]) - np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+        ih = np.minimum(boxes[:, None, 3], boxes[None, :, 3]) - np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+        inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+
+        area_a = areas[:, None]
+        area_b = areas[None, :]
+        union = area_a + area_b - inter
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            iou = np.where(inter > 0, inter / union, 0.0)
+            size_ratio = np.maximum(area_a, area_b) / np.minimum(area_a, area_b)
+            overlap = np.where(area_b > 0, inter / area_b, 0.0)
+
+        # Zero-area boxes count as maximally different in size
+        size_ratio = np.where(np.minimum(area_a, area_b) > 0, size_ratio, np.inf)
+
+        return np.where(size_ratio > self.size_ratio_threshold,
+                        overlap > self.overlap_threshold,
+                        iou > self.iou_threshold)
+
+    def _areas(self, boxes):
+        return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
     def _area(self, box):
         return (box[2] - box[0]) * (box[3] - box[1])
 
@@ -1,8 +1,13 @@
 # scr/coreclasses/managers/modelmanager.py
 
+import logging
 import os
+import threading
+import time
 import urllib.request
 
+logger = logging.getLogger(__name__)
+
 class ModelManager:
     ULTRALYTICS_URL = "https://github.com/ultralytics/assets/releases/download/v8.3.0/"
 
@@ -68,3 +73,57 @@ class ModelManager:
             os.path.join(os.path.dirname(this_file), "..", "..", "..")
         )
         return project_root
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models keyed by (path or name, device).
+
+    Pipelines built in the same process share one instance per key. Load and
+    warm-up durations are recorded per key for report().
+    """
+    _models = {}
+    _timings = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, key, loader):
+        """Return the model cached under key, calling loader() on first use."""
+        with cls._lock:
+            if key not in cls._models:
+                start = time.perf_counter()
+                cls._models[key] = loader()
+                cls._timings.setdefault(key, {})['load_s'] = time.perf_counter() - start
+                logger.info("✅ Loaded model %s in %.2fs", key, cls._timings[key]['load_s'])
+            return cls._models[key]
+
+    @classmethod
+    def warm_up(cls, key, run):
+        """Run a dummy inference once per key (run() loads the model if needed)."""
+        with cls._lock:
+            if 'warmup_s' in cls._timings.get(key, {}):
+                return
+            start = time.perf_counter()
+            run()
+            cls._timings.setdefault(key, {})['warmup_s'] = time.perf_counter() - start
+
+    @classmethod
+    def report(cls):
+        """Return {key: {'load_s': ..., 'warmup_s': ...}} for every model seen."""
+        with cls._lock:
+            return {key: dict(timing) for key, timing in cls._timings.items()}
+
+    @classmethod
+    def log_report(cls):
+        for key, timing in cls.report().items():
+            load = timing.get('load_s')
+            warm = timing.get('warmup_s')
+            load_txt = f"{load:.2f}s" if load is not None else "-"
+            warm_txt = f"{warm:.2f}s" if warm is not None else "-"
+            logger.info("📦 %s: load %s | warm-up %s", key, load_txt, warm_txt)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._models.clear()
+            cls._timings.clear()
@@ -0,0 +1,5 @@
+# scr/coreclasses/output/formats.py
+
+# Output format names, kept import-free so the CLI can build its parser cheaply
+SINK_KINDS = ("jpeg", "video", "annotations")
+STORE_FORMATS = ("jsonl", "npz")
@@ -0,0 +1,312 @@
+# scr/coreclasses/output/sinks.py
+
+# ========================================
+# Output sinks (JPEG / video / annotations)
+# ========================================
+import os
+import json
+import queue
+import threading
+import cv2
+import numpy as np
+from scr.coreclasses.output.formats import SINK_KINDS
+
+
+def to_jsonable(value):
+    """Convert pipeline results (FrameResult, tuples, NumPy scalars/arrays) into JSON-serializable values."""
+    if hasattr(value, "to_dict"):
+        return to_jsonable(value.to_dict())
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _rescale(image, scale):
+    if scale == 1.0:
+        return image
+    h, w = image.shape[:2]
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+class FrameSink:
+    """Receives processed frames in order. Subclasses implement write()."""
+
+    def write(self, frame_index, results, image):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        """
+        Make everything written so far durable and return its resume state:
+        a list of output records (see restore_outputs) for a job journal.
+        """
+        self.flush()
+        return []
+
+    def close(self):
+        pass
+
+
+class JpegSink(FrameSink):
+    """One JPEG file per frame."""
+
+    def __init__(self, output_dir, quality=90, scale=1.0, name_pattern="frame_{index:06d}.jpg"):
+        self.output_dir = output_dir
+        self.scale = scale
+        self.name_pattern = name_pattern
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+        self.frames_written = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, frame_index, results, image):
+        out_path = os.path.join(self.output_dir, self.name_pattern.format(index=frame_index))
+        cv2.imwrite(out_path, _rescale(image, self.scale), self.params)
+        self.frames_written += 1
+
+
+class VideoSink(FrameSink):
+    """
+    All frames encoded into a single video file. Opened lazily on the first frame.
+
+    commit() closes the file so it is playable even if the job dies later;
+    further frames go to the next part (<stem>_0001.mp4, ...).
+
+    timed: place frames by their FrameResult timestamp instead of one per
+    output frame, repeating a frame over the gap before it, so playback
+    speed stays right when the sampling rate changes mid-stream.
+    """
+
+    def __init__(self, path, fps=25.0, scale=1.0, fourcc="mp4v", part=0, timed=False):
+        self.path = path
+        self.fps = fps
+        self.scale = scale
+        self.fourcc = fourcc
+        self.part = part
+        self.timed = timed
+        self.writer = None
+        self.frame_size = None
+        self.frames_written = 0
+        self._first_timestamp = None
+        self._slots_written = 0  # output frames since the first timestamp (timed mode)
+
+    @staticmethod
+    def part_path(path, part):
+        if part == 0:
+            return path
+        stem, ext = os.path.splitext(path)
+        return f"{stem}_{part:04d}{ext}"
+
+    def write(self, frame_index, results, image):
+        image = _rescale(image, self.scale)
+        if self.writer is None:
+            h, w = image.shape[:2]
+            self.frame_size = (w, h)
+            path = self.part_path(self.path, self.part)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.frame_size)
+            if not self.writer.isOpened():
+                raise RuntimeError(f"❌ Cannot open video writer: {path}")
+        elif (image.shape[1], image.shape[0]) != self.frame_size:
+            image = cv2.resize(image, self.frame_size)
+
+        for _ in range(self._repeats(getattr(results, "timestamp", None))):
+            self.writer.write(image)
+        self.frames_written += 1
+
+    def _repeats(self, timestamp):
+        """Output frames to spend on this frame: 1, or up to its timestamp's slot when timed."""
+        if not self.timed or timestamp is None:
+            return 1
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+        slot = int(round((timestamp - self._first_timestamp) * self.fps))
+        repeats = max(1, slot + 1 - self._slots_written)
+        self._slots_written += repeats
+        return repeats
+
+    def commit(self):
+        if self.writer is not None:
+            self.close()
+            self.part += 1
+        return [{"kind": "video", "path": self.path, "next_part": self.part}]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class AnnotationSink(FrameSink):
+    """Results only: one JSON line per frame, no image encoding."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+        self.frames_written = 0
+
+    def write(self, frame_index, results, image):
+        record = {"frame_index": frame_index, "results": to_jsonable(results)}
+        self.file.write(json.dumps(record) + "\n")
+        self.frames_written += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def commit(self):
+        self.flush()
+        os.fsync(self.file.fileno())
+        return [{"kind": "file", "path": self.path, "offset": self.file.tell()}]
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class MultiSink(FrameSink):
+    """Fans each frame out to several sinks."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def write(self, frame_index, results, image):
+        for sink in self.sinks:
+            sink.write(frame_index, results, image)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def commit(self):
+        return [record for sink in self.sinks for record in sink.commit()]
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class AsyncSink(FrameSink):
+    """
+    Moves writes of a wrapped sink onto background thread(s).
+
+    queue_size bounds frames waiting to be written; write() blocks when the
+    queue is full. workers > 1 is only valid for order-independent sinks
+    (e.g. JpegSink). Errors raised by the wrapped sink surface on the next
+    write(), flush() or close().
+    """
+
+    _STOP = object()
+
+    def __init__(self, sink, queue_size=64, workers=1):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                if self.error is None:
+                    self.sink.write(*item)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _raise_pending(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def write(self, frame_index, results, image):
+        self._raise_pending()
+        self.queue.put((frame_index, results, image))
+
+    def flush(self):
+        self.queue.join()
+        self._raise_pending()
+        self.sink.flush()
+
+    def commit(self):
+        self.queue.join()
+        self._raise_pending()
+        return self.sink.commit()
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(self._STOP)
+        for thread in self.threads:
+            thread.join()
+        self.sink.close()
+        self._raise_pending()
+
+
+def restore_outputs(records):
+    """
+    Roll outputs back to a commit() state before a resumed job appends to
+    them: files are truncated to their committed size, video parts written
+    after the commit are deleted.
+    """
+    for record in records:
+        if record["kind"] == "file":
+            if os.path.exists(record["path"]):
+                with open(record["path"], "r+b") as f:
+                    f.truncate(record["offset"])
+        elif record["kind"] == "video":
+            part = record["next_part"]
+            while os.path.exists(VideoSink.part_path(record["path"], part)):
+                os.remove(VideoSink.part_path(record["path"], part))
+                part += 1
+        elif record["kind"] == "chunks":
+            chunk = record["next_chunk"]
+            while os.path.exists(record["pattern"].format(chunk=chunk)):
+                os.remove(record["pattern"].format(chunk=chunk))
+                chunk += 1
+
+
+def build_sink(kinds, output_dir, jpeg_quality=90, scale=1.0, video_fps=25.0,
+               async_writers=1, queue_size=64, resume=None, timed_video=False):
+    """
+    kinds: iterable of names from SINK_KINDS
+    async_writers: background writer threads per sink (0 = write on the caller thread)
+    resume: commit() state of an interrupted run to continue from (after
+            restore_outputs); annotations are appended, video goes to the next part
+    timed_video: place video frames by timestamp (see VideoSink), for variable sampling
+    """
+    video_part = 0
+    for record in resume or []:
+        if record["kind"] == "video":
+            video_part = record["next_part"]
+
+    sinks = []
+    for kind in kinds:
+        if kind == "jpeg":
+            sink = JpegSink(output_dir, quality=jpeg_quality, scale=scale)
+            workers = async_writers
+        elif kind == "video":
+            sink = VideoSink(os.path.join(output_dir, "annotated.mp4"), fps=video_fps, scale=scale,
+                             part=video_part, timed=timed_video)
+            workers = min(async_writers, 1)  # frame order matters
+        elif kind == "annotations":
+            sink = AnnotationSink(os.path.join(output_dir, "annotations.jsonl"), append=resume is not None)
+            workers = min(async_writers, 1)
+        else:
+            raise ValueError(f"❌ Unknown sink '{kind}', expected one of {SINK_KINDS}")
+
+        sinks.append(AsyncSink(sink, queue_size=queue_size, workers=workers) if workers else sink)
+
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
@@ -0,0 +1,111 @@
+# scr/coreclasses/processing/adaptive_sampler.py
+
+# ========================================
+# Adaptive Sampler (skip rate / analysis depth from a time budget)
+# ========================================
+import math
+
+from scr.coreclasses.processing.motion_gate import MotionGate
+
+
+class AdaptiveSampler:
+    """
+    Chooses the frame skip and analysis depth at runtime from the measured
+    processing cost per frame and the scene activity.
+
+    Skip rate: keeps up with target_fps source frames per wall-clock second
+    (e.g. the video's FPS for real-time) by processing one frame in every
+    ceil(target_fps * seconds per frame). Quiet scenes (little change
+    between sampled frames) skip at least quiet_skip.
+
+    Analysis depth: when a processed frame costs more than latency_budget_ms,
+    full analysis (age / gender / race) is dropped to emotion only; full
+    analysis is retried every probe_interval batches.
+    """
+
+    def __init__(self, target_fps=None, latency_budget_ms=None, min_skip=0, max_skip=30,
+                 quiet_threshold=0.01, quiet_skip=0, smoothing=0.3, probe_interval=50,
+                 full_analysis=True):
+        """
+        target_fps: source frames per second to sustain (None = skip only on quiet scenes)
+        latency_budget_ms: max processing time per analyzed frame (None = never drop depth)
+        min_skip / max_skip: bounds of the chosen skip
+        quiet_threshold: changed-pixel fraction below which the scene counts as quiet
+        quiet_skip: skip used on quiet scenes when larger than the budget's
+        smoothing: weight of the newest measurement in the moving averages
+        full_analysis: analysis depth of the config; never raised above it
+        """
+        self.target_fps = target_fps
+        self.latency_budget = latency_budget_ms / 1000.0 if latency_budget_ms else None
+        self.min_skip = min_skip
+        self.max_skip = max_skip
+        self.quiet_threshold = quiet_threshold
+        self.quiet_skip = quiet_skip
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+        self.allow_full = full_analysis
+
+        self.motion = MotionGate(threshold=0.0)  # used only to measure change between sampled frames
+        self.frame_cost = None  # seconds per processed frame (moving average)
+        self.activity = None  # changed-pixel fraction between sampled frames (decaying peak)
+        self.skip = min_skip
+        self.full_analysis = full_analysis
+        self._batches_light = 0
+        self._probing = False
+
+    def _average(self, current, value):
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def measure(self, frame):
+        """Update scene activity from a sampled frame; returns its change from the previous one (None for the first)."""
+        first = self.motion.reference is None
+        self.motion.should_process(frame)
+        if first:
+            return None
+        change = self.motion.last_change
+        # React to motion at once, settle back to quiet gradually
+        if self.activity is None or change > self.activity:
+            self.activity = change
+        else:
+            self.activity = self._average(self.activity, change)
+        return change
+
+    def observe(self, frames, seconds):
+        """Record that `frames` frames took `seconds` of wall time, then update the decision."""
+        if frames <= 0:
+            return
+        cost = seconds / frames
+        self.frame_cost = cost if self._probing else self._average(self.frame_cost, cost)
+        self._probing = False
+        self._update_depth()
+        self._update_skip()
+
+    def _update_skip(self):
+        skip = self.min_skip
+        if self.target_fps and self.frame_cost:
+            skip = max(skip, math.ceil(self.target_fps * self.frame_cost - 1e-9) - 1)
+        if self.activity is not None and self.activity < self.quiet_threshold:
+            skip = max(skip, self.quiet_skip)
+        self.skip = min(self.max_skip, skip)
+
+    def _update_depth(self):
+        if not self.allow_full or self.latency_budget is None:
+            return
+        if self.full_analysis:
+            if self.frame_cost > self.latency_budget:
+                self.full_analysis = False
+                self._batches_light = 0
+        else:
+            self._batches_light += 1
+            if self._batches_light >= self.probe_interval:
+                self.full_analysis = True  # probe: the scene may have fewer faces now
+                self._probing = True  # judge full analysis on its own next measurement
+
+    def decision(self):
+        """Current choice, as recorded per frame in FrameResult.meta['sampling']."""
+        return {
+            "skip": self.skip,
+            "full_analysis": self.full_analysis,
+            "activity": self.activity,
+            "frame_cost_ms": None if self.frame_cost is None else self.frame_cost * 1000.0,
+        }
@@ -0,0 +1,115 @@
+# scr/coreclasses/processing/analysis_cache.py
+
+# ========================================
+# Analysis Cache (LRU keyed by perceptual hash)
+# ========================================
+import sys
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+_ENTRY_OVERHEAD = 128  # hash key + OrderedDict node, roughly
+
+
+def difference_hash(image, hash_size=8):
+    """dHash: sign of horizontal gradients of a (hash_size+1) x hash_size grayscale thumbnail, as an int."""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _approx_size(value):
+    """Rough deep size in bytes of an analysis result (str / dict / list / numbers)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(v) for v in value)
+    return size
+
+
+class AnalysisCache:
+    def __init__(self, max_entries=2048, max_bytes=16 * 1024 * 1024, hash_size=8, max_distance=0):
+        """
+        max_entries / max_bytes: least recently used entries are evicted past either cap
+        hash_size: dHash grid size (hash_size**2 bits)
+        max_distance: Hamming distance up to which two crops count as the same face
+                      (0 = exact hash match only)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+
+        self.entries = OrderedDict()  # hash -> (result, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, crop):
+        """Perceptual hash of a crop, or None if it cannot be cached (empty crop)."""
+        if crop is None or crop.size == 0:
+            return None
+        return difference_hash(crop, self.hash_size)
+
+    def lookup(self, key):
+        """Return (hit, result). Near matches within max_distance count as hits."""
+        if key is None:
+            self.misses += 1
+            return False, None
+
+        match = key if key in self.entries else self._nearest(key)
+        if match is None:
+            self.misses += 1
+            return False, None
+
+        self.entries.move_to_end(match)
+        self.hits += 1
+        return True, self.entries[match][0]
+
+    def count_hit(self):
+        """Record a hit served without lookup(): a crop repeated earlier in the same batch."""
+        self.hits += 1
+
+    def _nearest(self, key):
+        if not self.max_distance:
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for candidate in self.entries:
+            distance = bin(candidate ^ key).count("1")
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def store(self, key, result):
+        if key is None:
+            return
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+
+        size = _approx_size(result) + _ENTRY_OVERHEAD
+        self.entries[key] = (result, size)
+        self.bytes += size
+
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
@@ -0,0 +1,152 @@
+# scr/coreclasses/processing/face_tracker.py
+
+# ========================================
+# Face Tracker (IoU / centroid matching)
+# ========================================
+import numpy as np
+
+
+def _iou_matrix(boxes_a, boxes_b):
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    iw = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def _centroid_distance_matrix(boxes_a, boxes_b):
+    """Centroid distance normalized by the diagonal of the box in boxes_a."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    diag = np.hypot(a[:, 2] - a[:, 0], a[:, 3] - a[:, 1])
+    dist = np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(diag[:, None] > 0, dist / diag[:, None], np.inf)
+
+
+class Track:
+    __slots__ = ("track_id", "box", "missed", "attributes", "analyzed_step", "analyzed_box")
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.missed = 0
+        self.attributes = None
+        self.analyzed_step = None
+        self.analyzed_box = None
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=0.3, max_centroid_shift=0.5, max_missed=5,
+                 reanalyze_every=15, change_iou=0.5):
+        """
+        iou_threshold: min IoU to match a detection to a track
+        max_centroid_shift: fallback match if centroid moved less than this
+                            fraction of the track box diagonal
+        max_missed: frames a track survives without a matching detection
+        reanalyze_every: re-run analysis for a track every K frames
+        change_iou: re-run analysis early if IoU between the current box and
+                    the box at last analysis drops below this
+        """
+        self.iou_threshold = iou_threshold
+        self.max_centroid_shift = max_centroid_shift
+        self.max_missed = max_missed
+        self.reanalyze_every = reanalyze_every
+        self.change_iou = change_iou
+
+        self.tracks = {}
+        self.next_id = 0
+        self.step = 0
+
+    def update(self, boxes):
+        """
+        Match this frame's boxes to existing tracks.
+        returns: list of track ids aligned with boxes
+        """
+        self.step += 1
+        track_ids = [None] * len(boxes)
+        active = list(self.tracks.values())
+
+        if boxes and active:
+            track_boxes = [t.box for t in active]
+            iou = _iou_matrix(track_boxes, boxes)
+            shift = _centroid_distance_matrix(track_boxes, boxes)
+
+            # Greedy: best IoU pairs first, then nearest centroids for the rest
+            score = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                             np.where(shift <= self.max_centroid_shift, 1.0 - shift, -np.inf))
+            used_tracks, used_boxes = set(), set()
+            for flat in np.argsort(-score, axis=None, kind="stable"):
+                t_idx, b_idx = np.unravel_index(flat, score.shape)
+                if not np.isfinite(score[t_idx, b_idx]):
+                    break
+                if t_idx in used_tracks or b_idx in used_boxes:
+                    continue
+                used_tracks.add(t_idx)
+                used_boxes.add(b_idx)
+                track = active[t_idx]
+                track.box = boxes[b_idx]
+                track.missed = 0
+                track_ids[b_idx] = track.track_id
+
+        for b_idx, box in enumerate(boxes):
+            if track_ids[b_idx] is None:
+                track = Track(self.next_id, box)
+                self.tracks[track.track_id] = track
+                self.next_id += 1
+                track_ids[b_idx] = track.track_id
+
+        matched = set(track_ids)
+        for track in active:
+            if track.track_id not in matched:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track.track_id]
+
+        return track_ids
+
+    def needs_analysis(self, track_id):
+        track = self.tracks[track_id]
+        if track.analyzed_step is None:
+            return True
+        if self.step - track.analyzed_step >= self.reanalyze_every:
+            return True
+        return _iou_matrix([track.analyzed_box], [track.box])[0, 0] < self.change_iou
+
+    def mark_analyzed(self, track_id):
+        """Record that analysis was scheduled for the track's current box."""
+        track = self.tracks[track_id]
+        track.analyzed_step = self.step
+        track.analyzed_box = track.box
+
+    def store(self, track_id, attributes):
+        track = self.tracks.get(track_id)
+        if track is None:
+            return
+        track.attributes = attributes
+        if attributes is None:
+            # Failed analysis is retried on the next frame
+            track.analyzed_step = None
+
+    def cached(self, track_id):
+        """Last stored attributes of a track, or None if it has none (or has expired)."""
+        track = self.tracks.get(track_id)
+        return track.attributes if track is not None else None
+
+    def forget_attributes(self):
+        """Drop cached attributes (e.g. after the analysis depth changed); tracks are re-analyzed."""
+        for track in self.tracks.values():
+            track.attributes = None
+            track.analyzed_step = None
+
+    def reset(self):
+        self.tracks.clear()
+        self.next_id = 0
+        self.step = 0
@@ -1,7 +1,9 @@
 # src/coreclasses/processing/frame_result.py
 
 class FrameResult:
-    def __init__(self, frame_index, timestamp):
+    __slots__ = ("frame_index", "timestamp", "detections", "meta")
+
+    def __init__(self, frame_index=None, timestamp=None):
         self.frame_index = frame_index
         self.timestamp = timestamp  # seconds or ms depending on video source
         self.detections = []  # list of dicts with 'label', 'box', 'score', etc.
@@ -15,6 +17,7 @@ class FrameResult:
         }
         entry.update(kwargs)
         self.detections.append(entry)
+        return entry
 
     def get_labels(self):
         return [d['label'] for d in self.detections]
@@ -22,5 +25,23 @@ class FrameResult:
     def get_boxes(self):
         return [d['box'] for d in self.detections]
 
+    def get_faces(self):
+        return [d for d in self.detections if d['label'] == 'face']
+
+    def to_dict(self):
+        return {
+            "frame_index": self.frame_index,
+            "timestamp": self.timestamp,
+            "detections": self.detections,
+            "meta": self.meta,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data.get("frame_index"), data.get("timestamp"))
+        result.detections = list(data.get("detections", []))
+        result.meta = dict(data.get("meta", {}))
+        return result
+
     def __repr__(self):
         return f"<FrameResult {self.frame_index} @ {self.timestamp}s | {len(self.detections)} detections>"
@@ -0,0 +1,77 @@
+# scr/coreclasses/processing/job_journal.py
+
+# ========================================
+# Job Journal (checkpoint / resume of a video job)
+# ========================================
+import json
+import os
+import time
+
+
+class JobJournal:
+    """
+    Checkpoint file of a long video job, rewritten atomically every
+    `interval` seconds.
+
+    Each checkpoint records the last frame whose outputs are fully
+    committed, where the grabber has to restart to continue the same
+    sampling, and the commit() state of every output, next to a job
+    description (input, config hash, sampling settings) that a resumed run
+    must match.
+    """
+
+    def __init__(self, path, job, interval=60.0):
+        """
+        job: JSON-serializable description of the run; resume is refused if it differs
+        interval: seconds between checkpoints (see due())
+        """
+        self.path = path
+        self.job = job
+        self.interval = interval
+        self.checkpoints = 0
+        self._last_checkpoint = time.monotonic()
+
+    @staticmethod
+    def load(path):
+        """Return the last checkpoint written to path, or None if there is none."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def mismatches(self, record):
+        """Job settings that differ between this run and a checkpoint."""
+        previous = record.get("job", {})
+        return [key for key in sorted(set(self.job) | set(previous)) if self.job.get(key) != previous.get(key)]
+
+    def due(self):
+        return time.monotonic() - self._last_checkpoint >= self.interval
+
+    def checkpoint(self, last_frame, next_frame, frames_done, outputs, sample_start=None, completed=False):
+        """
+        last_frame: last source frame whose outputs are committed
+        next_frame / sample_start: where a resumed grabber starts (start_frame / sample_start)
+        frames_done: frames committed since the job started
+        outputs: commit() states of the sinks and result store
+        """
+        record = {
+            "job": self.job,
+            "last_frame": last_frame,
+            "next_frame": next_frame,
+            "sample_start": sample_start,
+            "frames_done": frames_done,
+            "outputs": outputs,
+            "completed": completed,
+            "updated_at": time.time(),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.checkpoints += 1
+        self._last_checkpoint = time.monotonic()
+        return record
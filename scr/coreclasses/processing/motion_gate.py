@@ -0,0 +1,58 @@
+# scr/coreclasses/processing/motion_gate.py
+
+# ========================================
+# Motion Gate (skip unchanged frames)
+# ========================================
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, threshold=0.01, pixel_threshold=25, downscale_width=64, refresh_interval=30):
+        """
+        threshold: fraction of changed pixels (in the downscaled frame) needed
+                   to count the frame as new
+        pixel_threshold: per-pixel grayscale difference that counts as a change
+        downscale_width: width of the comparison thumbnail (aspect preserved)
+        refresh_interval: force processing after this many gated frames
+        """
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.downscale_width = downscale_width
+        self.refresh_interval = refresh_interval
+
+        self.reference = None  # thumbnail of the last processed frame
+        self.gated_in_row = 0
+        self.last_change = None
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.downscale_width, max(1, int(h * self.downscale_width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def should_process(self, frame):
+        """Return True if the frame differs enough from the last processed frame (or a refresh is due)."""
+        thumb = self._thumbnail(frame)
+
+        if self.reference is None or self.reference.shape != thumb.shape:
+            self.last_change = 1.0
+        else:
+            diff = cv2.absdiff(thumb, self.reference)
+            self.last_change = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+        if (self.last_change >= self.threshold or
+                self.gated_in_row >= self.refresh_interval):
+            self.reference = thumb
+            self.gated_in_row = 0
+            return True
+
+        self.gated_in_row += 1
+        return False
+
+    def reset(self):
+        self.reference = None
+        self.gated_in_row = 0
+        self.last_change = None
@@ -0,0 +1,47 @@
+# scr/coreclasses/processing/result_cache.py
+
+# ========================================
+# On-disk result cache (content hash + config hash)
+# ========================================
+import hashlib
+import json
+import os
+
+
+def content_hash(data):
+    """Hash of raw file bytes; identical images map to the same key wherever they live."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    One JSON file per processed image under <cache_dir>/<config_hash>/.
+
+    Results cached under another config hash are never returned, so changing
+    any setting reprocesses everything. Entries are written atomically, so an
+    interrupted run leaves no partial entries behind.
+    """
+
+    def __init__(self, cache_dir, config_hash):
+        self.root = os.path.join(cache_dir, config_hash)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached record for key, or None."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return record
+
+    def put(self, key, record):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
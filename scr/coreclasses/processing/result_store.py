@@ -0,0 +1,141 @@
+# scr/coreclasses/processing/result_store.py
+
+# ========================================
+# Columnar detection store (JSONL / NPZ)
+# ========================================
+import glob
+import json
+import os
+import numpy as np
+from scr.coreclasses.detectors.attribute_labels import EMOTION_LABELS
+from scr.coreclasses.output.formats import STORE_FORMATS
+
+CLASS_LABELS = ["person", "face"]
+
+# name -> (dtype, per-row shape, fill value)
+COLUMNS = {
+    "frame_index": (np.int64, (), -1),
+    "timestamp": (np.float64, (), np.nan),
+    "box": (np.int32, (4,), 0),
+    "class_id": (np.int16, (), -1),
+    "confidence": (np.float32, (), np.nan),
+    "track_id": (np.int32, (), -1),
+    "emotion_id": (np.int8, (), -1),
+    "emotion_scores": (np.float32, (len(EMOTION_LABELS),), np.nan),
+}
+
+
+class ResultStore:
+    """
+    Appends FrameResult detections into preallocated NumPy columns, one row
+    per detection, and streams full chunks to disk.
+
+    fmt="jsonl": rows appended to `path` as JSON lines
+    fmt="npz":   each chunk written to `<path stem>_<chunk>.npz`
+    """
+
+    def __init__(self, path, fmt="jsonl", chunk_size=4096, append=False):
+        if fmt not in STORE_FORMATS:
+            raise ValueError(f"❌ Unknown result format '{fmt}', expected one of {STORE_FORMATS}")
+
+        self.path = path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.columns = {
+            name: np.full((chunk_size,) + shape, fill, dtype=dtype)
+            for name, (dtype, shape, fill) in COLUMNS.items()
+        }
+        self.count = 0        # rows in the current chunk
+        self.rows_written = 0
+        self.chunks_written = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a" if append else "w", encoding="utf-8") if fmt == "jsonl" else None
+        if append and fmt == "npz":
+            self.chunks_written = len(glob.glob(f"{os.path.splitext(path)[0]}_[0-9]*.npz"))
+
+    def append(self, frame_result):
+        for det in frame_result.detections:
+            if self.count == self.chunk_size:
+                self.flush()
+            self._set_row(self.count, frame_result, det)
+            self.count += 1
+
+    def _set_row(self, row, frame_result, det):
+        cols = self.columns
+        cols["frame_index"][row] = -1 if frame_result.frame_index is None else frame_result.frame_index
+        cols["timestamp"][row] = np.nan if frame_result.timestamp is None else frame_result.timestamp
+        cols["box"][row] = det["box"]
+        cols["class_id"][row] = CLASS_LABELS.index(det["label"]) if det["label"] in CLASS_LABELS else -1
+        cols["confidence"][row] = np.nan if det.get("score") is None else det["score"]
+        cols["track_id"][row] = -1 if det.get("track_id") is None else det["track_id"]
+
+        emotion = det.get("dominant_emotion", det.get("emotion"))
+        cols["emotion_id"][row] = EMOTION_LABELS.index(emotion) if emotion in EMOTION_LABELS else -1
+
+        scores = det.get("emotion")
+        if isinstance(scores, dict):
+            cols["emotion_scores"][row] = [scores.get(label, np.nan) for label in EMOTION_LABELS]
+        else:
+            cols["emotion_scores"][row] = np.nan
+
+    def flush(self):
+        """Write the buffered rows and reset the chunk."""
+        if self.count == 0:
+            return
+
+        chunk = {name: col[:self.count] for name, col in self.columns.items()}
+        if self.fmt == "jsonl":
+            self._write_jsonl(chunk)
+        else:
+            np.savez_compressed(self._chunk_pattern().format(chunk=self.chunks_written),
+                                class_labels=np.array(CLASS_LABELS),
+                                emotion_labels=np.array(EMOTION_LABELS),
+                                **chunk)
+
+        self.rows_written += self.count
+        self.chunks_written += 1
+        self.count = 0
+
+    def _write_jsonl(self, chunk):
+        listed = {name: col.tolist() for name, col in chunk.items()}
+        lines = []
+        for i in range(self.count):
+            row = {name: values[i] for name, values in listed.items()}
+            # JSON has no NaN; use null for missing values
+            for key in ("timestamp", "confidence"):
+                if row[key] != row[key]:
+                    row[key] = None
+            if all(v != v for v in row["emotion_scores"]):
+                row["emotion_scores"] = None
+            lines.append(json.dumps(row))
+        self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+
+    def _chunk_pattern(self):
+        return os.path.splitext(self.path)[0] + "_{chunk:05d}.npz"
+
+    def commit(self):
+        """Write buffered rows durably and return the resume state (see sinks.restore_outputs)."""
+        self.flush()
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+            return [{"kind": "file", "path": self.path, "offset": self.file.tell()}]
+        return [{"kind": "chunks", "pattern": self._chunk_pattern(), "next_chunk": self.chunks_written}]
+
+    def close(self):
+        self.flush()
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+
+    def __len__(self):
+        return self.rows_written + self.count
+
+    @staticmethod
+    def load_npz(path):
+        """Concatenate every chunk written for `path` into one dict of columns."""
+        stem = os.path.splitext(path)[0]
+        chunks = [np.load(p) for p in sorted(glob.glob(f"{stem}_[0-9]*.npz"))]
+        if not chunks:
+            return {name: np.empty((0,) + shape, dtype=dtype) for name, (dtype, shape, _) in COLUMNS.items()}
+        return {name: np.concatenate([c[name] for c in chunks]) for name in COLUMNS}
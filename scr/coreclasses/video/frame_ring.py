@@ -0,0 +1,80 @@
+# scr/coreclasses/video/frame_ring.py
+
+# ========================================
+# Frame Ring (preallocated frame slots)
+# ========================================
+import queue
+import threading
+import numpy as np
+
+
+class FrameRing:
+    """
+    Fixed pool of equally shaped frame slots, allocated once.
+
+    The producer acquire()s a free slot, decodes into frames[slot] in place
+    and hands the slot index on; the consumer release()s it when done. Memory
+    use is num_slots * frame bytes for the whole stream, whatever the batch
+    or queue settings.
+    """
+
+    def __init__(self, frame_shape, num_slots, dtype=np.uint8, buffer=None, free_queue=None, fill=True):
+        """
+        buffer: optional preallocated memory (e.g. shared memory) to place the slots in
+        free_queue: queue of free slot indices; pass a multiprocessing queue to
+                    share the ring between processes
+        fill: put every slot on free_queue (False when attaching to a ring
+              another process already filled)
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.num_slots = num_slots
+        self.frames = np.ndarray((num_slots,) + self.frame_shape, dtype=dtype, buffer=buffer)
+        self._free = free_queue if free_queue is not None else queue.Queue()
+        if fill:
+            for slot in range(num_slots):
+                self._free.put(slot)
+        self._in_use = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def frame_bytes(frame_shape, dtype=np.uint8):
+        return int(np.prod(frame_shape)) * np.dtype(dtype).itemsize
+
+    @classmethod
+    def slots_for_budget(cls, frame_shape, memory_budget_mb, min_slots, max_slots=None, dtype=np.uint8):
+        """Slots fitting memory_budget_mb (at most max_slots), but never below min_slots."""
+        slots = int(memory_budget_mb * 1024 * 1024) // cls.frame_bytes(frame_shape, dtype)
+        if max_slots:
+            slots = min(slots, max_slots)
+        return max(min_slots, slots)
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def acquire(self, timeout=None):
+        """Return a free slot index, or None if none frees up within timeout."""
+        try:
+            slot = self._free.get(timeout=timeout) if timeout != 0 else self._free.get_nowait()
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._in_use.add(slot)
+        return slot
+
+    def claim(self, slots):
+        """Record slots acquired by another process as held here, so release() returns them."""
+        with self._lock:
+            self._in_use.update(slots)
+
+    def release(self, slot):
+        """Return a slot to the pool; releasing a free slot (or None) is a no-op."""
+        with self._lock:
+            if slot not in self._in_use:
+                return
+            self._in_use.discard(slot)
+        self._free.put(slot)
+
+    def owns(self, frame):
+        """True if frame is a view into this ring's memory."""
+        return isinstance(frame, np.ndarray) and np.may_share_memory(frame, self.frames)
@@ -0,0 +1,164 @@
+# scr/coreclasses/video/process_frame_grabber.py
+
+# ========================================
+# Process Frame Grabber (decode in a child process)
+# ========================================
+import logging
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+
+from scr.coreclasses.video.frame_ring import FrameRing
+from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.utils.instrumentation import NULL_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARED_BUDGET_MB = 256  # /dev/shm is often small (64 MB in default Docker)
+
+
+class _SharedMemoryReader(VideoFrameGrabber):
+    """Child-process side: the regular reader loop, sending slot metadata instead of frames."""
+
+    def _put(self, item):
+        batch, indices, capture_times, slots = item
+        if len(slots) != len(indices):
+            raise RuntimeError("❌ Frame size changed mid-stream; not supported with decode_process")
+        super()._put((None, indices, capture_times, slots))
+
+
+def _decode_main(reader_kwargs, shm_name, frame_shape, num_slots, free_queue, frame_queue, stop_event):
+    """Child process entry point: decode into the shared ring until the stream ends or stop is set."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    reader = _SharedMemoryReader(**reader_kwargs, ring_buffer=True)
+    try:
+        reader.ring = FrameRing(frame_shape, num_slots, buffer=shm.buf, free_queue=free_queue, fill=False)
+        reader.frame_queue = frame_queue
+        reader.stop_event = stop_event
+        reader._open_capture()
+        reader._reader_worker()
+        frame_queue.put({"frames_read": reader.frames_read,
+                         "frames_skipped": reader.frames_skipped,
+                         "frames_dropped": reader.frames_dropped})
+    finally:
+        reader.ring = None  # drop the views before detaching
+        shm.close()
+
+
+class ProcessFrameGrabber(VideoFrameGrabber):
+    """
+    VideoFrameGrabber whose capture/decode loop runs in a child process, so
+    decoding does not compete with inference for the GIL.
+
+    Frames are decoded straight into a FrameRing placed in shared memory;
+    only (frame indices, capture times, slot ids) cross the process
+    boundary. Iteration, batch attributes, release_batch() and retain()
+    behave as with ring_buffer=True on the threaded grabber. The ring is
+    sized by memory_budget_mb (default DEFAULT_SHARED_BUDGET_MB).
+    """
+
+    def __init__(self, video_path, metrics=NULL_INSTRUMENTATION, **kwargs):
+        kwargs.pop("ring_buffer", None)
+        kwargs["memory_budget_mb"] = kwargs.get("memory_budget_mb") or DEFAULT_SHARED_BUDGET_MB
+        super().__init__(video_path, metrics=metrics, ring_buffer=True, **kwargs)
+        self.reader_kwargs = dict(kwargs, video_path=video_path)
+        self.process = None
+        self.shm = None
+
+    def _probe(self):
+        """Frame shape, FPS and frame count, read in this process before the child starts."""
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened():
+                raise RuntimeError(f"❌ Cannot open video: {self.video_path}")
+            ret, frame = cap.read()
+            if not ret:
+                raise RuntimeError(f"❌ Cannot read a frame from: {self.video_path}")
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            return frame.shape, cap.get(cv2.CAP_PROP_FPS) or None, total_frames if total_frames > 0 else None
+        finally:
+            cap.release()
+
+    def open(self):
+        frame_shape, self.fps, self.total_frames = self._probe()
+        num_slots = self._ring_slots(frame_shape)
+
+        ctx = mp.get_context("spawn")
+        self.shm = shared_memory.SharedMemory(create=True, size=num_slots * FrameRing.frame_bytes(frame_shape))
+        free_queue = ctx.Queue()
+        self.frame_queue = ctx.Queue(maxsize=self.queue_size)
+        self.stop_event = ctx.Event()
+        self.ring = FrameRing(frame_shape, num_slots, buffer=self.shm.buf, free_queue=free_queue)
+        self._log_ring()
+
+        self.process = ctx.Process(
+            target=_decode_main,
+            args=(self.reader_kwargs, self.shm.name, frame_shape, num_slots,
+                  free_queue, self.frame_queue, self.stop_event),
+            daemon=True
+        )
+        self.process.start()
+        logger.info("🎞️ Decoding %s in process %d", self.video_path, self.process.pid)
+
+    def __iter__(self):
+        if self.process is None:
+            self.open()
+        try:
+            while True:
+                item = self._get()
+                if item is None:
+                    break
+                _, self.batch_frame_indices, self.batch_capture_times, self.batch_slots = item
+                self.ring.claim(self.batch_slots)
+                self.metrics.count('frames_read', len(self.batch_slots))
+                yield [self.ring.frames[slot] for slot in self.batch_slots]
+                self.release_batch()
+            self._collect_stats()
+        finally:
+            self.close()
+
+    def _get(self):
+        # Poll so a crashed child ends iteration instead of hanging it
+        while True:
+            try:
+                return self.frame_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError(f"❌ Decode process exited with code {self.process.exitcode}")
+
+    def _collect_stats(self):
+        try:
+            stats = self.frame_queue.get(timeout=5.0)
+        except queue.Empty:
+            return
+        self.frames_read = stats["frames_read"]
+        self.frames_skipped = stats["frames_skipped"]
+        self.frames_dropped = stats["frames_dropped"]
+        self.metrics.count('frames_skipped', self.frames_skipped)
+        self.metrics.count('frames_dropped', self.frames_dropped)
+
+    def close(self):
+        if self.process is not None:
+            self.stop_event.set()
+            # Drain so a child blocked on a full queue can see the stop and exit
+            deadline = time.monotonic() + 5.0
+            while self.process.is_alive() and time.monotonic() < deadline:
+                try:
+                    self.frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join()
+        if self.shm is not None:
+            self.ring = None
+            self.batch_slots = []
+            try:
+                self.shm.close()
+            except BufferError:
+                pass  # a caller still holds a frame view; memory is freed when it goes away
+            self.shm.unlink()
+            self.shm = None
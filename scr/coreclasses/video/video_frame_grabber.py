@@ -1,8 +1,20 @@
 # scr/coreclasses/video_frame_grabber.py
 
+import logging
+import math
 import cv2
 import threading
 import queue
+import time
+import numpy as np
+
+from scr.coreclasses.video.frame_ring import FrameRing
+from scr.utils.instrumentation import NULL_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+SKIP_MODES = ("read", "grab", "seek", "auto")
+DROP_POLICIES = ("block", "latest")
 
 class VideoFrameGrabber:
     def __init__(self, 
@@ -10,83 +22,399 @@ class VideoFrameGrabber:
                  skip_frames=0,
                  max_frames=None,
                  start_frame=0,
+                 end_frame=None,
                  batch_size=1,
                  batch_skip=0,
-                 queue_size=32):
-        
+                 queue_size=32,
+                 skip_mode="auto",
+                 seek_threshold=30,
+                 target_fps=None,
+                 sample_interval=None,
+                 sample_start=None,
+                 drop_policy="block",
+                 realtime=False,
+                 ring_buffer=False,
+                 memory_budget_mb=None,
+                 metrics=NULL_INSTRUMENTATION):
+        """
+        skip_mode: how skipped frames are consumed
+            read  - decode and discard (legacy behaviour)
+            grab  - grab without retrieve (demux only, no decode/convert)
+            seek  - jump via CAP_PROP_POS_FRAMES
+            auto  - grab for skips shorter than seek_threshold, seek otherwise
+        target_fps / sample_interval: sample by timestamp instead of frame
+            counts (one frame every 1/target_fps or sample_interval seconds);
+            replaces skip_frames and batch_skip when set
+        sample_start: source time (s) of sample 0 (default: start_frame's
+            timestamp); lets a range started mid-video keep another run's grid
+        end_frame: stop before this source frame index (None = end of video)
+        drop_policy: what the reader does when the queue is full
+            block  - wait for the consumer (every frame is processed)
+            latest - discard the oldest queued batch (freshness over completeness)
+        realtime: pace reads at the source FPS, as a live camera would deliver
+            them (replays a local file at its native rate)
+        ring_buffer: decode into a preallocated FrameRing instead of a new
+            array per frame. Yielded frames are views into the ring and are
+            reused once the next batch is requested (or after
+            release_batch()); use retain(frame) to keep one longer.
+        memory_budget_mb: size the ring to this many MB (implies ring_buffer);
+            the reader waits for free slots instead of growing memory
+        metrics: Instrumentation receiving read/skip counters, reader
+            stalls (queue full) and the queue depth gauge
+        """
+        if skip_mode not in SKIP_MODES:
+            raise ValueError(f"❌ Unknown skip_mode '{skip_mode}', expected one of {SKIP_MODES}")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"❌ Unknown drop_policy '{drop_policy}', expected one of {DROP_POLICIES}")
+
         self.video_path = video_path
         self.skip_frames = skip_frames
         self.max_frames = max_frames
         self.start_frame = start_frame
+        self.end_frame = end_frame
         self.batch_size = batch_size
         self.batch_skip = batch_skip
         self.queue_size = queue_size
+        self.skip_mode = skip_mode
+        self.seek_threshold = seek_threshold
+        self.sample_interval = sample_interval
+        self.sample_start = sample_start
+        self.drop_policy = drop_policy
+        self.realtime = realtime
+        self.use_ring = bool(ring_buffer or memory_budget_mb)
+        self.memory_budget_mb = memory_budget_mb
+        self.metrics = metrics
+        if target_fps:
+            self.sample_interval = 1.0 / target_fps
 
         self.cap = None
         self.total_frames = None
+        self.fps = None
+        self.position = start_frame  # index of the next frame the capture returns
 
         self.frame_queue = queue.Queue(maxsize=self.queue_size)
         self.reader_thread = None
         self.stop_event = threading.Event()
         self.frames_read = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0
+        self.batch_frame_indices = []  # source frame indices of the last yielded batch
+        self.batch_capture_times = []  # wall-clock time (time.time()) each frame was read
+        self.batch_slots = []  # ring slots backing the last yielded batch
+        self.ring = None  # created on the first frame, once its shape is known
+        self._pace_start = None
 
     def open(self):
+        self._open_capture()
+        self.reader_thread = threading.Thread(target=self._reader_worker)
+        self.reader_thread.daemon = True
+        self.reader_thread.start()
+
+    def _open_capture(self):
         self.cap = cv2.VideoCapture(self.video_path)
         if not self.cap.isOpened():
             raise RuntimeError(f"❌ Cannot open video: {self.video_path}")
 
+        # Live sources report no (or a negative) frame count and cannot seek
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
-        print(f"🎞️ Opened video: {self.video_path}")
-        print(f"🎞️ Total frames: {self.total_frames}")
+        if self.total_frames <= 0:
+            self.total_frames = None
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        if self.start_frame:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        self.position = self.start_frame
+        logger.info("🎞️ Opened video: %s", self.video_path)
+        logger.info("🎞️ Total frames: %s", self.total_frames or "unknown (live source)")
 
-        self.reader_thread = threading.Thread(target=self._reader_worker)
-        self.reader_thread.daemon = True
-        self.reader_thread.start()
+        if self.realtime and not self.fps:
+            logger.warning("⚠️ Video reports no FPS; realtime pacing disabled")
+            self.realtime = False
+
+        if self.sample_interval and not self.fps:
+            logger.warning("⚠️ Video reports no FPS; timestamp sampling disabled")
+            self.sample_interval = None
+
+    def timestamp_of(self, frame_index):
+        """Return the source timestamp (seconds) of a frame index, or None if FPS is unknown."""
+        return frame_index / self.fps if self.fps else None
+
+    def output_fps(self):
+        """Rate of the sampled frame sequence (for writing it back out as video)."""
+        if self.sample_interval:
+            return 1.0 / self.sample_interval
+        if not self.fps:
+            return None
+        period = self.skip_frames + 1
+        if self.batch_skip:
+            period *= (self.batch_skip + 1)
+        return self.fps / period
+
+    def _read(self, out=None):
+        if self.realtime:
+            self._pace()
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def _skip(self, count):
+        """Advance the capture by `count` frames without keeping them. Returns False at end of stream."""
+        if count <= 0:
+            return True
+
+        mode = self.skip_mode
+        if mode == "auto":
+            mode = "grab" if count < self.seek_threshold else "seek"
+
+        if mode == "seek":
+            target = self.position + count
+            if self.total_frames and target >= self.total_frames:
+                return False
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self.position = target
+            self.frames_skipped += count
+            self.metrics.count('frames_skipped', count)
+            return True
+
+        for _ in range(count):
+            if self.realtime:
+                self._pace()
+            ok = self.cap.grab() if mode == "grab" else self.cap.read()[0]
+            if not ok:
+                return False
+            self.position += 1
+            self.frames_skipped += 1
+        self.metrics.count('frames_skipped', count)
+        return True
+
+    def _pace(self):
+        """Sleep until the next frame is due at the source FPS."""
+        now = time.monotonic()
+        if self._pace_start is None:
+            self._pace_start = now - (self.position - self.start_frame) / self.fps
+        delay = self._pace_start + (self.position - self.start_frame) / self.fps - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _read_frame(self):
+        """Read the next frame, into a ring slot when the ring is enabled. Returns (ret, frame, slot)."""
+        if not self.use_ring:
+            ret, frame = self._read()
+            return ret, frame, None
+
+        slot = None
+        if self.ring is not None:
+            slot = self._acquire_slot()
+            if slot is None:
+                return False, None, None  # stopped while waiting for a free slot
+
+        ret, frame = self._read(self.ring.frames[slot] if slot is not None else None)
+        if not ret:
+            if slot is not None:
+                self.ring.release(slot)
+            return False, None, None
+
+        if self.ring is None:
+            self._create_ring(frame.shape)
+            slot = self._acquire_slot()
+
+        view = self.ring.frames[slot]
+        if not np.may_share_memory(frame, view):
+            # First frame, or the decoder had to reallocate
+            if frame.shape != self.ring.frame_shape:
+                self.ring.release(slot)  # resolution changed mid-stream: hand out an unpooled frame
+                return True, frame, None
+            view[...] = frame
+        return True, view, slot
+
+    def _create_ring(self, frame_shape):
+        self.ring = FrameRing(frame_shape, self._ring_slots(frame_shape))
+        self._log_ring()
+
+    def _ring_slots(self, frame_shape):
+        # The reader fills one batch while the consumer holds another; more
+        # than a full queue on top of that is never used
+        min_slots = 2 * self.batch_size
+        max_slots = self.batch_size * (self.queue_size + 2)
+        if not self.memory_budget_mb:
+            return max_slots
+        slots = FrameRing.slots_for_budget(frame_shape, self.memory_budget_mb, min_slots, max_slots)
+        if slots * FrameRing.frame_bytes(frame_shape) > self.memory_budget_mb * 1024 * 1024:
+            logger.warning("⚠️ Memory budget too small for two batches; using %d slots", slots)
+        return slots
+
+    def _log_ring(self):
+        logger.info("🧮 Frame ring: %d slots of %s (%.0f MB)", self.ring.num_slots,
+                    "x".join(map(str, self.ring.frame_shape)), self.ring.nbytes / (1024 * 1024))
+
+    def _acquire_slot(self):
+        """Wait for a free ring slot (dropping stale batches under the latest policy). None if stopped."""
+        slot = self.ring.acquire(timeout=0)
+        if slot is not None:
+            return slot
+
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            if self.drop_policy == "latest" and self._drop_oldest():
+                slot = self.ring.acquire(timeout=0)
+            else:
+                slot = self.ring.acquire(timeout=0.1)
+            if slot is not None:
+                self.metrics.count('ring_stalls')
+                self.metrics.record('ring_stall', time.perf_counter() - start)
+                return slot
+        return None
+
+    def _release_slots(self, slots):
+        if self.ring is not None:
+            for slot in slots:
+                self.ring.release(slot)
+
+    def release_batch(self):
+        """Hand the ring slots of the last yielded batch back to the reader (also done on the next iteration)."""
+        self._release_slots(self.batch_slots)
+        self.batch_slots = []
+
+    def retain(self, frame):
+        """Return a frame that stays valid after release: a copy if it lives in the ring, else frame itself."""
+        if self.ring is not None and self.ring.owns(frame):
+            return frame.copy()
+        return frame
+
+    def _frames_until_next_sample(self, sample_count):
+        """Frames to skip so the next read lands on sample number `sample_count`."""
+        start_time = self.start_frame / self.fps if self.sample_start is None else self.sample_start
+        target = int(math.ceil((start_time + sample_count * self.sample_interval) * self.fps - 1e-6))
+        return max(0, target - self.position)
 
     def _reader_worker(self):
         read_count = 0
+        stream_ok = True
 
-        while not self.stop_event.is_set():
+        while stream_ok and not self.stop_event.is_set():
             if self.max_frames and read_count >= self.max_frames:
                 break
 
             batch = []
+            indices = []
+            capture_times = []
+            slots = []
             for _ in range(self.batch_size):
-                ret, frame = self.cap.read()
+                if self.max_frames and read_count >= self.max_frames:
+                    break
+
+                if self.sample_interval:
+                    stream_ok = self._skip(self._frames_until_next_sample(read_count))
+                    if not stream_ok:
+                        break
+
+                if self.end_frame is not None and self.position >= self.end_frame:
+                    stream_ok = False
+                    break
+
+                index = self.position
+                ret, frame, slot = self._read_frame()
                 if not ret:
+                    stream_ok = False
                     break
 
                 batch.append(frame)
+                if slot is not None:
+                    slots.append(slot)
+                indices.append(index)
+                capture_times.append(time.time())
                 read_count += 1
 
                 # Apply per-frame skip inside batch
-                for _ in range(self.skip_frames):
-                    _ = self.cap.read()
+                if not self.sample_interval:
+                    stream_ok = self._skip(self.skip_frames)
+                    if not stream_ok:
+                        break
 
             if not batch:
                 break
 
-            self.frame_queue.put(batch)
+            self.frames_read = read_count
+            self.metrics.count('frames_read', len(batch))
+            self._put((batch, indices, capture_times, slots))
 
             # Apply batch_skip logic
-            for _ in range(self.batch_skip):
-                for _ in range(self.batch_size + self.skip_frames):
-                    _ = self.cap.read()
+            if stream_ok and not self.sample_interval:
+                stream_ok = self._skip(self.batch_skip * (self.batch_size + self.skip_frames))
 
-        self.frame_queue.put(None)
+        # The reader owns the capture: close() never releases it under a running read
         self.cap.release()
+        self.frame_queue.put(None)
+
+    def _put(self, item):
+        """Queue a batch; time spent blocked on a full queue is a reader stall."""
+        try:
+            self.frame_queue.put_nowait(item)
+        except queue.Full:
+            if self.drop_policy == "latest":
+                self._put_latest(item)
+                return
+            start = time.perf_counter()
+            self.frame_queue.put(item)
+            self.metrics.count('reader_stalls')
+            self.metrics.record('reader_stall', time.perf_counter() - start)
+
+    def _put_latest(self, item):
+        """Make room by discarding the oldest queued batches, then queue item."""
+        while True:
+            try:
+                self.frame_queue.put_nowait(item)
+                return
+            except queue.Full:
+                self._drop_oldest()
+
+    def _drop_oldest(self):
+        """Discard the oldest queued batch and free its ring slots. Returns False if the queue was empty."""
+        try:
+            _, indices, _, slots = self.frame_queue.get_nowait()
+        except queue.Empty:
+            return False
+        self._release_slots(slots)
+        self.frames_dropped += len(indices)
+        self.metrics.count('frames_dropped', len(indices))
+        return True
 
     def __iter__(self):
-        self.open()
+        if self.reader_thread is None:
+            self.open()
         while True:
-            batch = self.frame_queue.get()
-            if batch is None:
+            item = self.frame_queue.get()
+            if item is None:
                 break
+            batch, self.batch_frame_indices, self.batch_capture_times, self.batch_slots = item
+            self.metrics.gauge('queue_depth', self.frame_queue.qsize())
             yield batch
+            self.release_batch()
         self.reader_thread.join()
 
-    def close(self):
+    def close(self, timeout=5.0):
+        """Stop the reader and wait for it; the reader releases the capture on its way out."""
         self.stop_event.set()
-        if self.cap:
-            self.cap.release()
+        reader = self.reader_thread
+        if reader is None or not reader.is_alive():
+            if self.cap:
+                self.cap.release()  # never started, or already released by the reader
+            return
+        # Drain so a reader blocked on a full queue can see the stop and exit
+        deadline = time.monotonic() + timeout
+        while reader.is_alive() and time.monotonic() < deadline:
+            self._drain()
+            reader.join(timeout=0.1)
+        if reader.is_alive():
+            logger.warning("⚠️ Frame reader still blocked after %.0f s; it releases the capture when it returns",
+                           timeout)
+
+    def _drain(self):
+        """Discard every queued batch, freeing its ring slots."""
+        while True:
+            try:
+                item = self.frame_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self._release_slots(item[3])
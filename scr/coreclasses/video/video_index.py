@@ -0,0 +1,130 @@
+# scr/coreclasses/video/video_index.py
+
+# ========================================
+# Video Index (keyframes, frame count, FPS; cached sidecar)
+# ========================================
+import bisect
+import json
+import logging
+import os
+import shutil
+import subprocess
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+class VideoIndex:
+    """
+    Pre-scan of a video file: total frames, FPS and keyframe positions.
+
+    Keyframes come from ffprobe's packet list (demux only, no decoding).
+    Without ffprobe the index falls back to OpenCV's frame count and FPS and
+    has no keyframes, so segments split evenly. The index is cached as a
+    JSON sidecar next to the video (or at index_path) and rebuilt when the
+    video's size or modification time changes.
+    """
+
+    def __init__(self, video_path, total_frames, fps, keyframes=(), source="opencv"):
+        self.video_path = video_path
+        self.total_frames = total_frames
+        self.fps = fps
+        self.keyframes = sorted(keyframes)
+        self.source = source
+
+    @classmethod
+    def load_or_build(cls, video_path, index_path=None):
+        index_path = index_path or f"{video_path}.index.json"
+        stat = os.stat(video_path)
+        signature = {"size": stat.st_size, "mtime": stat.st_mtime, "version": INDEX_VERSION}
+
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("signature") == signature:
+                logger.info("🗂️ Loaded video index: %s", index_path)
+                return cls(video_path, data["total_frames"], data["fps"], data["keyframes"], data["source"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(video_path)
+        try:
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "total_frames": index.total_frames, "fps": index.fps,
+                           "keyframes": index.keyframes, "source": index.source}, f)
+        except OSError as e:
+            logger.warning("⚠️ Cannot write video index %s: %s", index_path, e)
+        return index
+
+    @classmethod
+    def build(cls, video_path):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"❌ Cannot open video: {video_path}")
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        cap.release()
+
+        keyframes = cls._probe_keyframes(video_path)
+        if keyframes is not None:
+            packet_count, keyframes = keyframes
+            logger.info("🗂️ Indexed %s with ffprobe: %d frames, %d keyframes",
+                        video_path, packet_count, len(keyframes))
+            return cls(video_path, packet_count, fps, keyframes, source="ffprobe")
+
+        if total_frames <= 0:
+            raise RuntimeError(f"❌ Cannot determine the frame count of: {video_path}")
+        logger.info("🗂️ Indexed %s with OpenCV: %d frames (no keyframe positions; install ffprobe)",
+                    video_path, total_frames)
+        return cls(video_path, total_frames, fps)
+
+    @staticmethod
+    def _probe_keyframes(video_path):
+        """(frame count, keyframe indices) from ffprobe packets in presentation order, or None."""
+        ffprobe = shutil.which("ffprobe")
+        if ffprobe is None:
+            return None
+        command = [ffprobe, "-v", "error", "-select_streams", "v:0",
+                   "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path]
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning("⚠️ ffprobe failed on %s: %s", video_path, e)
+            return None
+
+        packets = []
+        for line in output.splitlines():
+            pts_time, _, flags = line.partition(",")
+            try:
+                packets.append((float(pts_time), "K" in flags))
+            except ValueError:
+                continue  # packets without a timestamp
+        if not packets:
+            return None
+
+        packets.sort(key=lambda packet: packet[0])
+        return len(packets), [rank for rank, (_, key) in enumerate(packets) if key]
+
+    def segments(self, count, start=0, end=None):
+        """
+        Split [start, end) into up to `count` (start, end) frame ranges.
+        Inner boundaries move forward to the next keyframe, so each segment
+        begins where a decoder can start without decoding earlier frames.
+        """
+        end = self.total_frames if end is None else min(end, self.total_frames)
+        if end <= start:
+            return []
+
+        boundaries = [start]
+        for i in range(1, max(1, count)):
+            boundary = start + (end - start) * i // count
+            if self.keyframes:
+                pos = bisect.bisect_left(self.keyframes, boundary)
+                boundary = self.keyframes[pos] if pos < len(self.keyframes) else end
+            if boundaries[-1] < boundary < end:
+                boundaries.append(boundary)
+        boundaries.append(end)
+        return list(zip(boundaries[:-1], boundaries[1:]))
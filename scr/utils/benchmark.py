@@ -0,0 +1,271 @@
+# scr/utils/benchmark.py
+
+# ========================================
+# Benchmark harness (+ stub model stages)
+# ========================================
+import json
+import os
+import resource
+import sys
+import time
+import cv2
+import numpy as np
+from scr.coreclasses.config_loader import ConfigLoader
+from scr.coreclasses.detectors.attribute_labels import EMOTION_LABELS, GENDER_LABELS, RACE_LABELS
+from scr.coreclasses.detectors.facedetector import FaceDetector
+from scr.coreclasses.detectors.objectdetector import ObjectDetector
+from scr.coreclasses.filtering.boxdeduplicator import BoxDeduplicator
+from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.utils.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+
+def _random_boxes(rng, img_w, img_h, count, min_size, max_size, duplicate_rate=0.3):
+    """Random (x1, y1, x2, y2) boxes; a share of them get a jittered near-duplicate."""
+    boxes = []
+    max_size = max(min_size, min(max_size, img_w, img_h))
+    for _ in range(count):
+        size = int(rng.integers(min_size, max_size + 1))
+        w, h = size, int(size * rng.uniform(0.9, 1.2))
+        x1 = int(rng.integers(0, max(1, img_w - w)))
+        y1 = int(rng.integers(0, max(1, img_h - h)))
+        boxes.append((x1, y1, min(img_w, x1 + w), min(img_h, y1 + h)))
+        if rng.random() < duplicate_rate:
+            dx, dy = (int(v) for v in rng.integers(-size // 10, size // 10 + 1, size=2))
+            boxes.append((max(0, x1 + dx), max(0, y1 + dy), min(img_w, x1 + w + dx), min(img_h, y1 + h + dy)))
+    return boxes
+
+
+class StubObjectDetector(ObjectDetector):
+    """YOLO stand-in: random person boxes through the real expand/dedup/draw code."""
+
+    def __init__(self, persons_per_frame=3, latency_ms=0.0, seed=0, confidence=0.3,
+                 iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0):
+        # ObjectDetector.__init__ is skipped on purpose: no weights, no ultralytics
+        self.model_path = "stub"
+        self.device = "cpu"
+        self.confidence = confidence
+        self.deduplicator = BoxDeduplicator(iou_threshold, overlap_threshold, size_ratio_threshold)
+        self.metrics = NULL_INSTRUMENTATION
+        self.persons_per_frame = persons_per_frame
+        self.latency_ms = latency_ms
+        self.rng = np.random.default_rng(seed)
+
+    def warm_up(self, size=640):
+        pass
+
+    def infer(self, inputs, slack=0.0, draw_boxes=False, allowed_classes=None):
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        if self.latency_ms:
+            time.sleep(self.latency_ms * len(inputs) / 1000)
+
+        detections = []
+        for img_input in inputs:
+            img = self._load_image(img_input)
+            img_h, img_w = img.shape[:2]
+            raw_boxes = []
+            for box in _random_boxes(self.rng, img_w, img_h, self.persons_per_frame, img_h // 4, img_h):
+                x1, y1, x2, y2 = self._expand_box(*box, img_w, img_h, slack)
+                raw_boxes.append({
+                    'class': 'person',
+                    'confidence': float(self.rng.uniform(self.confidence, 1.0)),
+                    'box': (x1, y1, x2, y2)
+                })
+
+            filtered = self._deduplicate(raw_boxes)
+            detections.append({
+                'input': img_input,
+                'detections': filtered,
+                'visualized': self._draw_boxes(img, filtered) if draw_boxes else None
+            })
+        return detections
+
+
+class StubFaceDetector(FaceDetector):
+    """DeepFace detector stand-in: random face boxes through the real filter/dedup code."""
+
+    def __init__(self, faces_per_frame=4, latency_ms=0.0, seed=1, min_face_size=40, max_face_size=1024,
+                 min_aspect_ratio=0.5, max_aspect_ratio=2.0,
+                 iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0):
+        # FaceDetector.__init__ is skipped on purpose: no DeepFace import
+        self.backend = "stub"
+        self.min_face_size = min_face_size
+        self.max_face_size = max_face_size
+        self.min_aspect_ratio = min_aspect_ratio
+        self.max_aspect_ratio = max_aspect_ratio
+        self.deduplicator = BoxDeduplicator(iou_threshold, overlap_threshold, size_ratio_threshold)
+        self.metrics = NULL_INSTRUMENTATION
+        self.faces_per_frame = faces_per_frame
+        self.latency_ms = latency_ms
+        self.rng = np.random.default_rng(seed)
+
+    def warm_up(self, size=320):
+        pass
+
+    def _extract_boxes(self, image):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        h, w = image.shape[:2]
+        return _random_boxes(self.rng, w, h, self.faces_per_frame, min(self.min_face_size, h), max(self.min_face_size, h // 3))
+
+
+class StubAnalyzer:
+    """PoseAndEmotionAnalyzer stand-in returning random attributes of the same shape."""
+
+    def __init__(self, full_analysis=False, latency_ms=0.0, seed=2):
+        self.full_analysis = full_analysis
+        self.latency_ms = latency_ms
+        self.rng = np.random.default_rng(seed)
+
+    def warm_up(self):
+        pass
+
+    def predict_emotion(self, face_img):
+        return self.predict_emotion_batch([face_img])[0]
+
+    def predict_emotion_batch(self, face_imgs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms * len(face_imgs) / 1000)
+
+        results = []
+        for _ in face_imgs:
+            scores = self.rng.dirichlet(np.ones(len(EMOTION_LABELS))) * 100
+            dominant = EMOTION_LABELS[int(np.argmax(scores))]
+            if not self.full_analysis:
+                results.append(dominant)
+                continue
+            results.append({
+                "dominant_emotion": dominant,
+                "emotion": dict(zip(EMOTION_LABELS, scores.tolist())),
+                "age": int(self.rng.integers(18, 70)),
+                "gender": dict(zip(GENDER_LABELS, (self.rng.dirichlet(np.ones(2)) * 100).tolist())),
+                "race": dict(zip(RACE_LABELS, (self.rng.dirichlet(np.ones(len(RACE_LABELS))) * 100).tolist()))
+            })
+        return results
+
+
+def stub_stages(config_filename="config_default.yaml", configs_root="configs/", latency_ms=0.0):
+    """Stub stages configured with the same filter/dedup settings as the real pipeline."""
+    cfg = ConfigLoader(config_filename, base_path=configs_root).get()
+    dedup = cfg['deduplication']
+    det_filter = cfg['detector_filter']
+    return {
+        'person_detector': StubObjectDetector(
+            latency_ms=latency_ms,
+            iou_threshold=dedup.get('person_iou_threshold', 0.3),
+            overlap_threshold=dedup.get('person_overlap_threshold', 0.7),
+            size_ratio_threshold=dedup.get('person_size_ratio_threshold', 2.0),
+        ),
+        'face_detector': StubFaceDetector(
+            latency_ms=latency_ms,
+            min_face_size=det_filter.get('detector_face_min_size', 40),
+            max_face_size=det_filter.get('detector_face_max_size', 1024),
+            min_aspect_ratio=det_filter.get('detector_face_min_aspect_ratio', 0.5),
+            max_aspect_ratio=det_filter.get('detector_face_max_aspect_ratio', 2.0),
+            iou_threshold=dedup.get('face_iou_threshold', 0.3),
+            overlap_threshold=dedup.get('face_overlap_threshold', 0.7),
+            size_ratio_threshold=dedup.get('face_size_ratio_threshold', 2.0),
+        ),
+        'analyzer': StubAnalyzer(
+            full_analysis=cfg['pipeline'].get('full_analysis', False),
+            latency_ms=latency_ms,
+        ),
+    }
+
+
+def make_synthetic_video(path, num_frames=300, width=1280, height=720, fps=25.0, seed=0):
+    """Write a video of moving blocks over a drifting gradient (MJPG, so any OpenCV build can read it)."""
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"❌ Cannot write synthetic video: {path}")
+
+    gradient = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+    blocks = [(rng.integers(0, width), rng.integers(0, height), rng.integers(-8, 9), rng.integers(-8, 9),
+               tuple(int(c) for c in rng.integers(0, 256, size=3))) for _ in range(6)]
+    for i in range(num_frames):
+        frame = cv2.merge([np.roll(gradient, i * 4, axis=1)] * 3)
+        for x, y, vx, vy, color in blocks:
+            cx, cy = int(x + vx * i) % width, int(y + vy * i) % height
+            cv2.rectangle(frame, (cx, cy), (cx + width // 10, cy + height // 6), color, -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(pipeline, video_path, num_frames=300, batch_size=1, sink=None, grabber_kwargs=None,
+                  grabber_cls=VideoFrameGrabber):
+    """
+    Run the pipeline over `num_frames` frames and return a report dict.
+
+    Stages: grab (wait for the next batch), person_detect (per batch),
+    face_detect / dedup (per call), analysis (per batch), draw (per batch),
+    write (per frame). Percentiles are in milliseconds.
+    """
+    metrics = Instrumentation()
+    pipeline.set_instrumentation(metrics)
+
+    grabber = grabber_cls(video_path, max_frames=num_frames, batch_size=batch_size,
+                          metrics=metrics, **(grabber_kwargs or {}))
+    batches = iter(grabber)
+
+    frames_done = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            with metrics.stage('grab'):
+                frame_batch = next(batches, None)
+            if frame_batch is None:
+                break
+
+            indices = list(grabber.batch_frame_indices)
+            with metrics.stage('pipeline'):
+                outputs = pipeline.process_batch(frame_batch, frame_indices=indices,
+                                                 timestamps=[grabber.timestamp_of(i) for i in indices])
+
+            for frame_index, (frame_result, visual_img) in zip(indices, outputs):
+                if sink is not None:
+                    with metrics.stage('write'):
+                        sink.write(frame_index, frame_result, grabber.retain(visual_img))
+            frames_done += len(frame_batch)
+
+        if sink is not None:
+            with metrics.stage('write_close'):
+                sink.close()
+    finally:
+        pipeline.publish_stats()
+        pipeline.set_instrumentation(NULL_INSTRUMENTATION)
+
+    wall_s = time.perf_counter() - start
+    return {
+        "video": video_path,
+        "frames": frames_done,
+        "batch_size": batch_size,
+        "wall_s": wall_s,
+        "fps": frames_done / wall_s if wall_s > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": metrics.summary(),
+        "counters": dict(metrics.counters),
+    }
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report):
+    print(f"🏁 {report['frames']} frames in {report['wall_s']:.2f}s → {report['fps']:.1f} FPS | "
+          f"peak RSS {report['peak_rss_mb']:.0f} MB")
+    for name, stats in report["stages"].items():
+        if not stats.get("count"):
+            continue
+        print(f"   {name:<14} n={stats['count']:<6} p50={stats['p50_ms']:8.2f}ms "
+              f"p90={stats['p90_ms']:8.2f}ms p99={stats['p99_ms']:8.2f}ms")
@@ -0,0 +1,189 @@
+# scr/utils/instrumentation.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+def percentiles(samples, factor=1.0, unit=""):
+    """Summarize samples as count/mean/p50/p90/p99/max (values multiplied by factor)."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q):
+        return ordered[min(n - 1, int(round(q * (n - 1))))] * factor
+
+    return {
+        "count": n,
+        f"mean{unit}": sum(ordered) / n * factor,
+        f"p50{unit}": pick(0.50),
+        f"p90{unit}": pick(0.90),
+        f"p99{unit}": pick(0.99),
+        f"max{unit}": ordered[-1] * factor,
+    }
+
+
+def percentiles_ms(samples):
+    """Summarize durations (seconds) in milliseconds."""
+    return percentiles(samples, factor=1000, unit="_ms")
+
+
+class Instrumentation:
+    """
+    Low-overhead metrics for the pipeline and grabber.
+
+    stage(name)   - context manager timing a stage (last max_samples kept)
+    count(name)   - monotonically increasing counter
+    gauge(name)   - last-value metric (e.g. queue depth)
+    observe(name) - value distribution (e.g. faces per frame)
+
+    Snapshots go to registered callbacks and, if dump_path is set, to a
+    JSON or Prometheus text file, at most every dump_interval seconds via
+    maybe_dump(). Safe to update from several threads.
+    """
+
+    def __init__(self, max_samples=10000, dump_path=None, dump_format="json", dump_interval=10.0):
+        self.max_samples = max_samples
+        self.dump_path = dump_path
+        self.dump_format = dump_format
+        self.dump_interval = dump_interval
+
+        self.samples = {}   # stage -> durations (s)
+        self.totals = {}    # stage -> total seconds
+        self.values = {}    # distribution -> values
+        self.counters = {}
+        self.gauges = {}
+        self.callbacks = []
+
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            bucket = self.samples.get(name)
+            if bucket is None:
+                bucket = self.samples[name] = deque(maxlen=self.max_samples)
+            bucket.append(seconds)
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, value):
+        with self._lock:
+            bucket = self.values.get(name)
+            if bucket is None:
+                bucket = self.values[name] = deque(maxlen=self.max_samples)
+            bucket.append(value)
+
+    def add_callback(self, callback):
+        """callback(snapshot_dict) is called on every emit()."""
+        self.callbacks.append(callback)
+
+    def summary(self):
+        """Stage latency percentiles in milliseconds."""
+        with self._lock:
+            return {name: percentiles_ms(list(bucket)) for name, bucket in self.samples.items()}
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: dict(percentiles_ms(list(bucket)), total_s=self.totals.get(name, 0.0))
+                      for name, bucket in self.samples.items()}
+            distributions = {name: percentiles(list(bucket)) for name, bucket in self.values.items()}
+            return {
+                "timestamp": time.time(),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "stages": stages,
+                "distributions": distributions,
+            }
+
+    def to_json(self, snapshot=None):
+        return json.dumps(snapshot or self.snapshot(), indent=2)
+
+    def to_prometheus(self, snapshot=None, prefix="gvt"):
+        snap = snapshot or self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in sorted(snap["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        if snap["stages"]:
+            lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for stage, stats in sorted(snap["stages"].items()):
+            if not stats.get("count"):
+                continue
+            for q in ("50", "90", "99"):
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="0.{q}"}} {stats[f"p{q}_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["total_s"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def maybe_dump(self):
+        """emit() if dump_interval seconds passed since the last one."""
+        if time.monotonic() - self._last_dump >= self.dump_interval:
+            self.emit()
+
+    def emit(self):
+        """Send a snapshot to callbacks and the dump file."""
+        self._last_dump = time.monotonic()
+        snap = self.snapshot()
+        for callback in self.callbacks:
+            callback(snap)
+
+        if self.dump_path:
+            text = self.to_prometheus(snap) if self.dump_format == "prometheus" else self.to_json(snap)
+            tmp_path = f"{self.dump_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.dump_path)  # readers never see a partial file
+        return snap
+
+    def reset(self):
+        with self._lock:
+            for store in (self.samples, self.totals, self.values, self.counters, self.gauges):
+                store.clear()
+
+
+class NullInstrumentation:
+    """Records nothing; the default so un-instrumented runs pay almost nothing."""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def record(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+    def maybe_dump(self):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,89 @@
+# scr/utils/parallel_pipeline.py
+
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from scr.utils.pipeline_builder import build_pipeline
+
+# One pipeline per worker process, built once by the pool initializer
+_worker_pipeline = None
+
+
+def _init_worker(config_filename, configs_root, threads_per_worker, frame_state=True):
+    """frame_state=False: drop the tracker and motion gate, which need every frame in order."""
+    global _worker_pipeline
+
+    if threads_per_worker:
+        # Keep N workers from each spawning a full-size math thread pool
+        for var in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+            os.environ[var] = str(threads_per_worker)
+        import cv2
+        cv2.setNumThreads(threads_per_worker)
+        try:
+            import torch
+            torch.set_num_threads(threads_per_worker)
+        except ImportError:
+            pass
+
+    _worker_pipeline = build_pipeline(config_filename, configs_root)
+    if not frame_state:
+        _worker_pipeline.tracker = None
+        _worker_pipeline.motion_gate = None
+
+
+def _process_batch(frames, batch_kwargs):
+    return _worker_pipeline.process_batch(frames, **batch_kwargs)
+
+
+class ParallelPipeline:
+    """
+    Runs ProcessingPipeline.process_batch across worker processes, preserving
+    input order. Each worker sees only some of the batches, so tracking and
+    the motion gate are off in the workers.
+    """
+
+    def __init__(self, workers, config_filename="config_default.yaml", configs_root="configs/",
+                 max_in_flight=None, threads_per_worker=1):
+        """
+        workers: number of worker processes, each holding its own pipeline
+        max_in_flight: max batches submitted but not yet consumed (default 2 * workers);
+                       bounds memory and applies backpressure to the frame source
+        threads_per_worker: math library threads per worker (None = library default)
+        """
+        self.workers = workers
+        self.max_in_flight = max_in_flight or 2 * workers
+
+        # spawn: the grabber reader thread makes fork unsafe
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config_filename, configs_root, threads_per_worker, False)
+        )
+
+    def imap(self, tagged_batches):
+        """
+        tagged_batches: iterable of (tag, frames, batch_kwargs); batch_kwargs are
+                        passed on to process_batch (e.g. frame_indices, timestamps)
+        yields: (tag, [(FrameResult, visual_img), ...]) in the order batches were given
+        """
+        pending = deque()
+        for tag, frames, batch_kwargs in tagged_batches:
+            pending.append((tag, self.executor.submit(_process_batch, frames, batch_kwargs)))
+            if len(pending) >= self.max_in_flight:
+                tag_done, future = pending.popleft()
+                yield tag_done, future.result()
+
+        while pending:
+            tag_done, future = pending.popleft()
+            yield tag_done, future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
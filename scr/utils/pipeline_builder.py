@@ -1,21 +1,38 @@
 # scr/utils/pipeline_builder.py
 
+import logging
+import math
 import os
 import cv2
 from scr.coreclasses.config_loader import ConfigLoader
-from scr.coreclasses.managers.modelmanager import ModelManager
+from scr.coreclasses.managers.modelmanager import ModelManager, ModelRegistry
 from scr.coreclasses.detectors.facedetector import FaceDetector
 from scr.coreclasses.detectors.pose_emotion import PoseAndEmotionAnalyzer
 from scr.coreclasses.detectors.objectdetector import ObjectDetector
+from scr.coreclasses.detectors.onnx_objectdetector import OnnxObjectDetector
+from scr.coreclasses.processing.frame_result import FrameResult
+from scr.coreclasses.processing.face_tracker import FaceTracker
+from scr.coreclasses.processing.motion_gate import MotionGate
+from scr.coreclasses.processing.analysis_cache import AnalysisCache
+from scr.utils.instrumentation import NULL_INSTRUMENTATION
 
+logger = logging.getLogger(__name__)
 
 class ProcessingPipeline:
     """High level wrapper holding all detectors and analyzers."""
 
-    def __init__(self, config_filename="config_default.yaml", configs_root="configs/"):
+    def __init__(self, config_filename="config_default.yaml", configs_root="configs/", stages=None):
+        """
+        stages: optional pre-built stage objects by name ('person_detector',
+                'face_detector', 'analyzer') used instead of constructing them,
+                e.g. stub models for benchmarking
+        """
+        stages = stages or {}
+
         # Load config
         cfg_loader = ConfigLoader(config_filename, base_path=configs_root)
         self.cfg = cfg_loader.get()
+        self.config_hash = cfg_loader.config_hash()
 
         # Initialize model manager to resolve model paths
         model_manager = ModelManager()
@@ -25,67 +42,368 @@ class ProcessingPipeline:
         os.environ["DEEPFACE_HOME"] = deepface_home_path
         print(f"✅ DeepFace model path set to: {deepface_home_path}")
 
-        self.analyzer = PoseAndEmotionAnalyzer(
-            enforce_detection=True,
-            detector_backend=self.cfg['face_detector_backend'],
-            full_analysis=self.cfg['pipeline'].get('full_analysis', False),
-            enable_validation=self.cfg['analyzer'].get('enable_validation', False),
-            verification_threshold=self.cfg['analyzer'].get('verification_threshold', 0.4),
-            preview=self.cfg['pipeline'].get('preview', False)
-        )
-
-        self.face_detector = FaceDetector(
-            backend=self.cfg['face_detector_backend'],
-            min_face_size=self.cfg['detector_filter'].get('detector_face_min_size', 40),
-            max_face_size=self.cfg['detector_filter'].get('detector_face_max_size', 1024),
-            min_aspect_ratio=self.cfg['detector_filter'].get('detector_face_min_aspect_ratio', 0.5),
-            max_aspect_ratio=self.cfg['detector_filter'].get('detector_face_max_aspect_ratio', 2.0),
-            iou_threshold=self.cfg['deduplication'].get('face_iou_threshold', 0.3),
-            overlap_threshold=self.cfg['deduplication'].get('face_overlap_threshold', 0.7),
-            size_ratio_threshold=self.cfg['deduplication'].get('face_size_ratio_threshold', 2.0),
-        )
-
-        self.person_detector = ObjectDetector(
-            model_path=self.cfg['person_model_path'],
-            confidence=0.3,
-            iou_threshold=self.cfg['deduplication'].get('person_iou_threshold', 0.3),
-            overlap_threshold=self.cfg['deduplication'].get('person_overlap_threshold', 0.7),
-            size_ratio_threshold=self.cfg['deduplication'].get('person_size_ratio_threshold', 2.0),
-        )
+        # Stages can be switched off; their frameworks are then never imported
+        self.analyzer = stages.get('analyzer')
+        if self.analyzer is None and self.cfg['pipeline'].get('analyze_faces', True):
+            self.analyzer = PoseAndEmotionAnalyzer(
+                enforce_detection=True,
+                detector_backend=self.cfg['face_detector_backend'],
+                full_analysis=self.cfg['pipeline'].get('full_analysis', False),
+                enable_validation=self.cfg['analyzer'].get('enable_validation', False),
+                verification_threshold=self.cfg['analyzer'].get('verification_threshold', 0.4),
+                batch_size=self.cfg['analyzer'].get('batch_size', 32),
+                pre_detected_crops=self.cfg['analyzer'].get('pre_detected_crops', False),
+                preview=self.cfg['pipeline'].get('preview', False)
+            )
+
+        self.face_detector = stages.get('face_detector')
+        if self.face_detector is None:
+            self.face_detector = FaceDetector(
+                backend=self.cfg['face_detector_backend'],
+                min_face_size=self.cfg['detector_filter'].get('detector_face_min_size', 40),
+                max_face_size=self.cfg['detector_filter'].get('detector_face_max_size', 1024),
+                min_aspect_ratio=self.cfg['detector_filter'].get('detector_face_min_aspect_ratio', 0.5),
+                max_aspect_ratio=self.cfg['detector_filter'].get('detector_face_max_aspect_ratio', 2.0),
+                iou_threshold=self.cfg['deduplication'].get('face_iou_threshold', 0.3),
+                overlap_threshold=self.cfg['deduplication'].get('face_overlap_threshold', 0.7),
+                size_ratio_threshold=self.cfg['deduplication'].get('face_size_ratio_threshold', 2.0),
+            )
+
+        self.person_detector = stages.get('person_detector')
+        if self.person_detector is None and self.cfg['pipeline'].get('detect_persons', True):
+            detector_cls, options = ObjectDetector, {}
+            if self.cfg['person_model_backend'] == 'onnxruntime':
+                detector_cls, options = OnnxObjectDetector, self.cfg['person_model_options']
+            self.person_detector = detector_cls(
+                model_path=self.cfg['person_model_path'],
+                confidence=0.3,
+                iou_threshold=self.cfg['deduplication'].get('person_iou_threshold', 0.3),
+                overlap_threshold=self.cfg['deduplication'].get('person_overlap_threshold', 0.7),
+                size_ratio_threshold=self.cfg['deduplication'].get('person_size_ratio_threshold', 2.0),
+                **options
+            )
+        if self.person_detector is None and self.cfg['pipeline'].get('face_search', 'full') == 'cascade':
+            raise ValueError("❌ pipeline.face_search 'cascade' requires pipeline.detect_persons")
+
+        # Optional tracker: reuse face analysis across frames for the same track
+        tracking_cfg = self.cfg.get('tracking', {})
+        self.tracker = None
+        if tracking_cfg.get('enabled', False):
+            self.tracker = FaceTracker(
+                iou_threshold=tracking_cfg.get('iou_threshold', 0.3),
+                max_centroid_shift=tracking_cfg.get('max_centroid_shift', 0.5),
+                max_missed=tracking_cfg.get('max_missed', 5),
+                reanalyze_every=tracking_cfg.get('reanalyze_every', 15),
+                change_iou=tracking_cfg.get('change_iou', 0.5),
+            )
+
+        # Optional motion gate: reuse the previous results on unchanged frames
+        gate_cfg = self.cfg.get('motion_gate', {})
+        self.motion_gate = None
+        if gate_cfg.get('enabled', False):
+            self.motion_gate = MotionGate(
+                threshold=gate_cfg.get('threshold', 0.01),
+                pixel_threshold=gate_cfg.get('pixel_threshold', 25),
+                downscale_width=gate_cfg.get('downscale_width', 64),
+                refresh_interval=gate_cfg.get('refresh_interval', 30),
+            )
+        self._last_result = None
+
+        # Optional LRU cache of analysis results keyed by crop perceptual hash
+        cache_cfg = self.cfg.get('analysis_cache', {})
+        self.analysis_cache = None
+        if cache_cfg.get('enabled', False) and self.analyzer is not None:
+            self.analysis_cache = AnalysisCache(
+                max_entries=cache_cfg.get('max_entries', 2048),
+                max_bytes=int(cache_cfg.get('max_megabytes', 16) * 1024 * 1024),
+                hash_size=cache_cfg.get('hash_size', 8),
+                max_distance=cache_cfg.get('max_distance', 0),
+            )
+
+        self.metrics = NULL_INSTRUMENTATION
+        for stage in (self.person_detector, self.face_detector):
+            if stage is not None:
+                stage.metrics = self.metrics
+
+        if self.cfg['pipeline'].get('warm_up', False):
+            self.warm_up()
+
+    def warm_up(self):
+        """Load every configured model and run one dummy inference, then report timings."""
+        for stage in (self.person_detector, self.face_detector, self.analyzer):
+            if stage is not None:
+                stage.warm_up()
+        ModelRegistry.log_report()
+
+    def set_instrumentation(self, metrics):
+        """Attach an Instrumentation to the pipeline and its detectors (NULL_INSTRUMENTATION disables it)."""
+        self.metrics = metrics
+        for stage in (self.person_detector, self.face_detector):
+            if stage is not None:
+                stage.metrics = metrics
+
+    def publish_stats(self):
+        """End of run: log the analysis cache totals and put its hit rate into the metrics."""
+        if self.analysis_cache is None:
+            return
+        stats = self.analysis_cache.stats()
+        self.metrics.gauge('analysis_cache_hit_rate', stats['hit_rate'])
+        logger.info("🗃️ Analysis cache: %d hits / %d misses (%.0f%%), %d evictions, %d entries (%.1f MB)",
+                    stats['hits'], stats['misses'], stats['hit_rate'] * 100, stats['evictions'],
+                    stats['entries'], stats['bytes'] / (1024 * 1024))
+
+    def set_full_analysis(self, enabled):
+        """Switch analysis depth at runtime; cached analyses of the other depth are dropped."""
+        if self.analyzer is None or self.analyzer.full_analysis == enabled:
+            return
+        self.analyzer.full_analysis = enabled
+        if self.analysis_cache is not None:
+            self.analysis_cache.clear()
+        if self.tracker:
+            self.tracker.forget_attributes()
+
+    def reset(self):
+        """Forget cross-frame state (tracks, motion reference) before an unrelated frame sequence."""
+        if self.tracker:
+            self.tracker.reset()
+        if self.motion_gate:
+            self.motion_gate.reset()
+        self._last_result = None
 
     def process(self, image):
-        """Run detection and analysis on a single image."""
-        draw_person = self.cfg['pipeline'].get('draw_person_box', False)
-
-        person_results = self.person_detector.infer(
-            image,
-            draw_boxes=draw_person,
-            allowed_classes=['person']
-        )[0]
-        visual_img = person_results['visualized'] if person_results['visualized'] is not None else image.copy()
-
-        face_boxes = self.face_detector.detect_faces(image)
-
-        results = []
-        for (x1, y1, x2, y2) in face_boxes:
-            face_crop = image[y1:y2, x1:x2]
-            analysis = self.analyzer.predict_emotion(face_crop)
+        """Run detection and analysis on a single image. Returns (face results, visual_img)."""
+        frame_result, visual_img = self.process_batch([image])[0]
+        return frame_result.get_faces(), visual_img
+
+    def process_batch(self, frames, frame_indices=None, timestamps=None, capture_times=None, sampling=None):
+        """
+        Run detection and analysis on a list of frames.
+
+        Person detection runs once over the whole batch and face crops from
+        every frame are analysed together. Frames rejected by the motion gate
+        reuse the detections of the last processed frame. capture_times
+        (wall-clock read times) are kept in meta['captured_at']. sampling:
+        per-frame adaptive sampler records, kept in meta['sampling']; the
+        batch runs at the analysis depth of the first. Returns a list of
+        (FrameResult, visual_img) tuples in the same order as `frames`.
+        """
+        if not frames:
+            return []
+
+        frame_indices = frame_indices if frame_indices is not None else [None] * len(frames)
+        timestamps = timestamps if timestamps is not None else [None] * len(frames)
+        frame_results = [FrameResult(idx, ts) for idx, ts in zip(frame_indices, timestamps)]
+        if capture_times is not None:
+            for frame_result, captured_at in zip(frame_results, capture_times):
+                frame_result.meta['captured_at'] = captured_at
+        if sampling is not None:
+            self.set_full_analysis(sampling[0]['full_analysis'])
+            for frame_result, record in zip(frame_results, sampling):
+                frame_result.meta['sampling'] = record
+
+        # Motion gate: decide which frames need the detectors at all
+        process_mask = [True] * len(frames)
+        if self.motion_gate:
+            for pos, frame in enumerate(frames):
+                process_mask[pos] = self.motion_gate.should_process(frame)
+                frame_results[pos].meta['motion'] = self.motion_gate.last_change
+
+        active = [pos for pos, keep in enumerate(process_mask) if keep]
+        self.metrics.count('frames', len(frames))
+        self.metrics.count('frames_motion_gated', len(frames) - len(active))
+        self._detect_and_analyze([frames[pos] for pos in active],
+                                 [frame_results[pos] for pos in active])
+
+        for pos, frame_result in enumerate(frame_results):
+            if process_mask[pos]:
+                self._last_result = frame_result
+            elif self._last_result is not None:
+                frame_result.detections = list(self._last_result.detections)
+                frame_result.meta['reused_from'] = self._last_result.frame_index
+
+        # Visualization goes on copies unless draw_in_place (saves a full
+        # frame copy; the caller's frames are annotated after detection)
+        with self.metrics.stage('draw'):
+            if self.cfg['pipeline'].get('draw_in_place', False):
+                visual_imgs = list(frames)
+            else:
+                visual_imgs = [frame.copy() for frame in frames]
+            for visual_img, frame_result in zip(visual_imgs, frame_results):
+                self._draw_results(visual_img, frame_result)
+
+        return list(zip(frame_results, visual_imgs))
+
+    def _detect_and_analyze(self, frames, frame_results):
+        """Fill frame_results with person and face detections for frames."""
+        if not frames:
+            return
+
+        # Downscaled detection inputs, shared between detectors per frame
+        resized_cache = [{} for _ in frames]
+        person_max_side = self.cfg['detection_resolution'].get('person_max_side')
+        face_max_side = self.cfg['detection_resolution'].get('face_max_side')
+
+        person_inputs = [self._detection_input(frame, person_max_side, cache)
+                         for frame, cache in zip(frames, resized_cache)]
+
+        person_results = [{'detections': []} for _ in frames]
+        if self.person_detector is not None:
+            with self.metrics.stage('person_detect'):
+                person_results = self.person_detector.infer(
+                    [small for small, _ in person_inputs],
+                    draw_boxes=False,
+                    allowed_classes=['person']
+                )
+        for frame, frame_result, (_, scale), person_res in zip(frames, frame_results, person_inputs, person_results):
+            h, w = frame.shape[:2]
+            for det in person_res['detections']:
+                box = self._to_frame_coords(det['box'], scale, w, h)
+                frame_result.add_detection('person', box, score=det['confidence'])
+
+        # Gather faces across the batch. Each face either gets a new analysis
+        # job or, when tracking, reuses its track's cached/pending analysis.
+        faces = []      # (frame position, box, track id, job index or None, cached attributes)
+        job_crops = []
+        job_tracks = []
+        pending_jobs = {}  # track id -> job index scheduled earlier in this batch
+        cascade = self.cfg['pipeline'].get('face_search', 'full') == 'cascade'
+        slack = self.cfg['pipeline'].get('person_slack', 0.2)
+        for frame_pos, image in enumerate(frames):
+            h, w = image.shape[:2]
+            small, scale = self._detection_input(image, face_max_side, resized_cache[frame_pos])
+            if cascade:
+                # Search faces only inside (expanded) person boxes; none → no face stage
+                regions = [self.person_detector._expand_box(*d['box'], w, h, slack)
+                           for d in frame_results[frame_pos].detections if d['label'] == 'person']
+                regions = [tuple(int(v * scale) for v in region) for region in regions]
+                boxes = []
+                if regions:
+                    with self.metrics.stage('face_detect'):
+                        boxes = self.face_detector.detect_faces_in_regions(small, regions, scale)
+            else:
+                with self.metrics.stage('face_detect'):
+                    boxes = self.face_detector.detect_faces(small, scale)
+            # Analysis always crops from the full-resolution frame
+            boxes = [self._to_frame_coords(box, scale, w, h) for box in boxes]
+            track_ids = self.tracker.update(boxes) if self.tracker else [None] * len(boxes)
+
+            for (x1, y1, x2, y2), track_id in zip(boxes, track_ids):
+                job_idx = None
+                cached = None
+                if track_id is None or self.tracker.needs_analysis(track_id):
+                    job_idx = len(job_crops)
+                    job_crops.append(image[y1:y2, x1:x2])
+                    job_tracks.append(track_id)
+                    if track_id is not None:
+                        self.tracker.mark_analyzed(track_id)
+                        pending_jobs[track_id] = job_idx
+                elif track_id in pending_jobs:
+                    job_idx = pending_jobs[track_id]
+                else:
+                    # Read now: the track may expire later in this batch
+                    cached = self.tracker.cached(track_id)
+                faces.append((frame_pos, (x1, y1, x2, y2), track_id, job_idx, cached))
+
+        self.metrics.count('analysis_jobs', len(job_crops))
+        self.metrics.count('analysis_reused', len(faces) - len(job_crops))
+
+        # Near-identical crops seen before (or earlier in this batch) skip the analyzer
+        analyses = [None] * len(job_crops)
+        miss_idx = list(range(len(job_crops)))
+        aliases = []  # (job index, job index whose analysis it reuses)
+        if self.analysis_cache is not None:
+            cache_keys = [self.analysis_cache.key(crop) for crop in job_crops]
+            miss_idx = []
+            first_miss = {}
+            for job_idx, key in enumerate(cache_keys):
+                if key is not None and key in first_miss:
+                    # Same crop as a miss earlier in this batch: a hit once that one is analyzed
+                    aliases.append((job_idx, first_miss[key]))
+                    self.analysis_cache.count_hit()
+                    continue
+                hit, analysis = self.analysis_cache.lookup(key)
+                if hit:
+                    analyses[job_idx] = analysis
+                else:
+                    miss_idx.append(job_idx)
+                    if key is not None:
+                        first_miss[key] = job_idx
+            self.metrics.count('analysis_cache_hits', len(job_crops) - len(miss_idx))
+            self.metrics.count('analysis_cache_misses', len(miss_idx))
+
+        miss_crops = [job_crops[i] for i in miss_idx]
+        with self.metrics.stage('analysis'):
+            if self.analyzer is None:
+                fresh = [{} for _ in miss_crops]  # detection only
+            elif self.cfg['analyzer'].get('batch_analysis', False):
+                fresh = self.analyzer.predict_emotion_batch(miss_crops)
+            else:
+                fresh = [self.analyzer.predict_emotion(crop) for crop in miss_crops]
+
+        evictions = self.analysis_cache.evictions if self.analysis_cache is not None else 0
+        for job_idx, analysis in zip(miss_idx, fresh):
+            analyses[job_idx] = analysis
+            if self.analysis_cache is not None:
+                self.analysis_cache.store(cache_keys[job_idx], analysis)
+        for job_idx, source_idx in aliases:
+            analyses[job_idx] = analyses[source_idx]
+        if self.analysis_cache is not None:
+            self.metrics.count('analysis_cache_evictions', self.analysis_cache.evictions - evictions)
+            self.metrics.gauge('analysis_cache_entries', len(self.analysis_cache.entries))
+            self.metrics.gauge('analysis_cache_bytes', self.analysis_cache.bytes)
+
+        if self.tracker:
+            for track_id, analysis in zip(job_tracks, analyses):
+                self.tracker.store(track_id, analysis)
+
+        for frame_pos, box, track_id, job_idx, cached in faces:
+            analysis = analyses[job_idx] if job_idx is not None else cached
             if analysis is None:
+                self.metrics.count('faces_rejected_by_validation')
                 continue
 
-            if isinstance(analysis, dict):
-                res = analysis
-                res['box'] = (x1, y1, x2, y2)
-            else:
-                res = {'emotion': analysis, 'box': (x1, y1, x2, y2)}
-            results.append(res)
+            attributes = analysis if isinstance(analysis, dict) else {'emotion': analysis}
+            if track_id is not None:
+                attributes = dict(attributes, track_id=track_id)
+            frame_results[frame_pos].add_detection('face', box, **attributes)
 
+        for frame_result in frame_results:
+            num_faces = sum(1 for d in frame_result.detections if d['label'] == 'face')
+            self.metrics.count('faces', num_faces)
+            self.metrics.observe('faces_per_frame', num_faces)
+
+    @staticmethod
+    def _detection_input(image, max_side, cache):
+        """Return (image resized so its longest side <= max_side, scale), reusing cache."""
+        h, w = image.shape[:2]
+        if not max_side or max(h, w) <= max_side:
+            return image, 1.0
+        if max_side not in cache:
+            scale = max_side / max(h, w)
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            cache[max_side] = (cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale)
+        return cache[max_side]
+
+    @staticmethod
+    def _to_frame_coords(box, scale, img_w, img_h):
+        if scale == 1.0:
+            return tuple(int(v) for v in box)
+        x1, y1, x2, y2 = box
+        return (max(0, int(x1 / scale)), max(0, int(y1 / scale)),
+                min(img_w, int(math.ceil(x2 / scale))), min(img_h, int(math.ceil(y2 / scale))))
+
+    def _draw_results(self, visual_img, frame_result):
+        if self.person_detector is not None and self.cfg['pipeline'].get('draw_person_box', False):
+            persons = [{'class': d['label'], 'confidence': d['score'], 'box': d['box']}
+                       for d in frame_result.detections if d['label'] == 'person']
+            self.person_detector._draw_boxes(visual_img, persons)
+
+        for res in frame_result.get_faces():
+            x1, y1, x2, y2 = res['box']
             cv2.rectangle(visual_img, (x1, y1), (x2, y2), (0, 0, 255), 2)
             label = res.get('dominant_emotion', res.get('emotion', ''))
             cv2.putText(visual_img, str(label), (x1, max(y1 - 10, 0)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
 
-        return results, visual_img
-
-def build_pipeline(config_filename="config_default.yaml", configs_root="configs/"):
+def build_pipeline(config_filename="config_default.yaml", configs_root="configs/", stages=None):
     """Return a ready-to-use ProcessingPipeline instance."""
-    return ProcessingPipeline(config_filename=config_filename, configs_root=configs_root)
+    return ProcessingPipeline(config_filename=config_filename, configs_root=configs_root, stages=stages)
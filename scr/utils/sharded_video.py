@@ -0,0 +1,152 @@
+# scr/utils/sharded_video.py
+
+# ========================================
+# Sharded video processing (one video, segments in parallel)
+# ========================================
+import json
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scr.coreclasses.output.sinks import AnnotationSink, JpegSink, MultiSink, VideoSink
+from scr.coreclasses.processing.frame_result import FrameResult
+from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.utils import parallel_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Merged track ids are segment * TRACK_ID_STRIDE + the segment's own id (int32 in results.npz)
+TRACK_ID_STRIDE = 1_000_000
+
+
+def _namespace_tracks(frame_result, segment_id):
+    """Make a segment's track ids unique in the merged stream (each segment tracks from 0)."""
+    for det in frame_result.detections:
+        if det.get("track_id") is not None:
+            det["track_id"] = segment_id * TRACK_ID_STRIDE + det["track_id"]
+    return frame_result
+
+
+def _process_segment(segment_id, start, end, grabber_kwargs, output_dir, sink_kinds, sink_kwargs):
+    """Worker: run one frame range through the worker's pipeline, writing its own segment outputs."""
+    pipeline = parallel_pipeline._worker_pipeline
+    pipeline.reset()  # tracks and motion reference do not carry across segments
+
+    segment_dir = os.path.join(output_dir, "segments")
+    annotations_path = os.path.join(segment_dir, f"seg_{segment_id:04d}.jsonl")
+    video_path = None
+    sinks = [AnnotationSink(annotations_path)]  # always written: the parent merges from it
+    if "jpeg" in sink_kinds:
+        sinks.append(JpegSink(output_dir, quality=sink_kwargs["jpeg_quality"], scale=sink_kwargs["scale"]))
+    if "video" in sink_kinds:
+        video_path = os.path.join(segment_dir, f"annotated_{segment_id:04d}.mp4")
+        sinks.append(VideoSink(video_path, fps=sink_kwargs["video_fps"], scale=sink_kwargs["scale"]))
+    sink = MultiSink(sinks)
+
+    grabber = VideoFrameGrabber(start_frame=start, end_frame=end, **grabber_kwargs)
+    grabber.open()
+    frames_done = 0
+    try:
+        for frame_batch in grabber:
+            indices = list(grabber.batch_frame_indices)
+            outputs = pipeline.process_batch(frame_batch, frame_indices=indices,
+                                             timestamps=[grabber.timestamp_of(i) for i in indices])
+            for frame_index, (frame_result, visual_img) in zip(indices, outputs):
+                sink.write(frame_index, frame_result, visual_img)
+                frames_done += 1
+    finally:
+        grabber.close()
+        sink.close()
+
+    return {"segment": segment_id, "start": start, "end": end, "frames": frames_done,
+            "annotations": annotations_path, "video": video_path}
+
+
+class ShardedVideoRunner:
+    """
+    Processes frame ranges of one video concurrently, one grabber per
+    segment, each worker process holding its own pipeline. Results are
+    merged back in segment order, so the output stream has the same global
+    frame indices and timestamps as a sequential run. Tracks restart at each
+    segment; their ids are namespaced by segment (see TRACK_ID_STRIDE).
+    """
+
+    def __init__(self, workers, config_filename="config_default.yaml", configs_root="configs/",
+                 threads_per_worker=1):
+        self.workers = workers
+        # spawn: the grabber reader thread makes fork unsafe
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=parallel_pipeline._init_worker,
+            initargs=(config_filename, configs_root, threads_per_worker)
+        )
+
+    @staticmethod
+    def align_segments(segments, start_frame, skip_frames=0, sample_interval=None, fps=None):
+        """
+        Move each segment start onto the sampling grid of a sequential run from
+        start_frame, so sharding does not change which frames are sampled.
+        Returns (start, end, sample_start) ranges; sample_start is the exact
+        time of the segment's first sample (None when sampling by frame count).
+        Segments left without a sampled frame are dropped.
+        """
+        aligned = []
+        for start, end in segments:
+            sample_start = None
+            if sample_interval and fps:
+                # First sample landing on a frame at or after the segment start
+                count = max(0, math.floor((start - 1 - start_frame) / fps / sample_interval))
+                while True:
+                    sample_start = start_frame / fps + count * sample_interval
+                    frame = int(math.ceil(sample_start * fps - 1e-6))
+                    if frame >= start:
+                        break
+                    count += 1
+                start = frame
+            else:
+                period = skip_frames + 1
+                start = start_frame + -(-(start - start_frame) // period) * period
+            if start < end:
+                aligned.append((start, end, sample_start))
+        return aligned
+
+    def run(self, segments, grabber_kwargs, output_dir, sink_kinds, sink_kwargs):
+        """
+        segments: list of (start, end, sample_start) from align_segments()
+        yields: (frame_index, FrameResult) for every processed frame, in frame order
+        """
+        os.makedirs(os.path.join(output_dir, "segments"), exist_ok=True)
+        futures = [
+            self.executor.submit(_process_segment, segment_id, start, end,
+                                 dict(grabber_kwargs, sample_start=sample_start),
+                                 output_dir, sink_kinds, sink_kwargs)
+            for segment_id, (start, end, sample_start) in enumerate(segments)
+        ]
+
+        for future in futures:
+            summary = future.result()
+            logger.info("🧩 Segment %d [%d, %d) done: %d frames", summary["segment"],
+                        summary["start"], summary["end"], summary["frames"])
+            with open(summary["annotations"], "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    frame_result = FrameResult.from_dict(record["results"])
+                    yield record["frame_index"], _namespace_tracks(frame_result, summary["segment"])
+            os.remove(summary["annotations"])
+
+        try:
+            os.rmdir(os.path.join(output_dir, "segments"))
+        except OSError:
+            pass  # segment videos are kept
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,46 @@
+# tests/test_analysis_cache.py
+
+import os
+
+import numpy as np
+
+from scr.coreclasses.processing.analysis_cache import AnalysisCache
+from scr.utils.benchmark import stub_stages
+from scr.utils.instrumentation import Instrumentation
+from scr.utils.pipeline_builder import build_pipeline
+
+CONFIGS_ROOT = os.path.join(os.path.dirname(__file__), "..", "scr", "configs") + os.sep
+
+
+def test_lru_eviction_and_stats():
+    cache = AnalysisCache(max_entries=2)
+    for key in (1, 2, 3):
+        cache.store(key, "happy")
+    assert cache.lookup(1) == (False, None)
+    assert cache.lookup(3) == (True, "happy")
+    assert cache.stats()["evictions"] == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_pipeline_counts_match_cache_stats():
+    stages = stub_stages("config_default.yaml", CONFIGS_ROOT)
+    pipeline = build_pipeline("config_default.yaml", CONFIGS_ROOT, stages=stages)
+    pipeline.cfg['pipeline']['face_search'] = 'full'
+    pipeline.analysis_cache = AnalysisCache(max_entries=1)
+    metrics = Instrumentation()
+    pipeline.set_instrumentation(metrics)
+
+    # Every crop of a flat (or a horizontal gradient) frame has the same dHash, so
+    # faces after the first in a batch reuse its analysis within the batch
+    flat = np.zeros((240, 320, 3), np.uint8)
+    gradient = np.tile(np.linspace(0, 255, 320, dtype=np.uint8)[None, :, None], (240, 1, 3))
+    pipeline.process_batch([flat, flat])
+    pipeline.process_batch([gradient, gradient])
+    pipeline.publish_stats()
+
+    stats = pipeline.analysis_cache.stats()
+    assert stats["hits"] > 0 and stats["evictions"] == 1
+    assert metrics.counters["analysis_cache_hits"] == stats["hits"]
+    assert metrics.counters["analysis_cache_misses"] == stats["misses"]
+    assert metrics.counters["analysis_cache_evictions"] == stats["evictions"]
+    assert metrics.gauges["analysis_cache_hit_rate"] == stats["hit_rate"]
@@ -0,0 +1,48 @@
+# tests/test_boxdeduplicator.py
+
+import numpy as np
+
+from scr.coreclasses.filtering.boxdeduplicator import BoxDeduplicator
+
+
+def _boxes(seed, count=40):
+    """Random boxes, many of them nested or jittered copies of another."""
+    rng = np.random.default_rng(seed)
+    boxes = []
+    for _ in range(count):
+        if boxes and rng.random() < 0.5:
+            x1, y1, x2, y2 = boxes[rng.integers(len(boxes))]
+            dx, dy = rng.integers(-10, 11, size=2)
+            grow = rng.integers(0, 60)
+            boxes.append((x1 + dx, y1 + dy, x2 + dx + grow, y2 + dy + grow))
+        else:
+            x1, y1 = rng.integers(0, 400, size=2)
+            w, h = rng.integers(5, 200, size=2)
+            boxes.append((x1, y1, x1 + w, y1 + h))
+    return [tuple(int(v) for v in box) for box in boxes]
+
+
+def _greedy_reference(dedup, boxes):
+    """The original pairwise loop: smallest area first, drop duplicates of a kept box."""
+    order = sorted(range(len(boxes)), key=lambda i: dedup._area(boxes[i]))
+    kept = []
+    for idx in order:
+        if not any(dedup.is_duplicate(boxes[idx], boxes[k]) for k in kept):
+            kept.append(idx)
+    return kept
+
+
+def test_duplicate_matrix_matches_is_duplicate():
+    dedup = BoxDeduplicator()
+    boxes = _boxes(seed=0)
+    matrix = dedup.duplicate_matrix(boxes)
+    for a, box_a in enumerate(boxes):
+        for b, box_b in enumerate(boxes):
+            assert matrix[a, b] == dedup.is_duplicate(box_a, box_b), (box_a, box_b)
+
+
+def test_keep_indices_matches_pairwise_greedy():
+    for seed in range(20):
+        dedup = BoxDeduplicator(iou_threshold=0.3, overlap_threshold=0.7, size_ratio_threshold=2.0)
+        boxes = _boxes(seed)
+        assert dedup.keep_indices(boxes) == _greedy_reference(dedup, boxes)
@@ -0,0 +1,43 @@
+# tests/test_face_tracker.py
+
+from scr.coreclasses.processing.face_tracker import FaceTracker
+
+BOX = (10, 10, 60, 60)
+
+
+def test_cached_survives_track_expiry():
+    tracker = FaceTracker(max_missed=5)
+    assert tracker.update([BOX]) == [0]
+    tracker.mark_analyzed(0)
+    tracker.store(0, {"emotion": "happy"})
+
+    assert tracker.update([BOX]) == [0]
+    assert not tracker.needs_analysis(0)
+    attributes = tracker.cached(0)  # read when the face is scheduled
+
+    for _ in range(7):
+        tracker.update([])
+    assert 0 not in tracker.tracks
+    assert tracker.cached(0) is None
+    assert attributes == {"emotion": "happy"}
+
+
+def test_store_after_expiry_is_ignored():
+    tracker = FaceTracker(max_missed=0)
+    tracker.update([BOX])
+    tracker.update([])
+    tracker.store(0, {"emotion": "sad"})
+    assert tracker.tracks == {}
+
+
+def test_forget_attributes_forces_reanalysis():
+    tracker = FaceTracker()
+    tracker.update([BOX])
+    tracker.mark_analyzed(0)
+    tracker.store(0, {"emotion": "happy", "age": 30})
+    tracker.update([BOX])
+    assert not tracker.needs_analysis(0)
+
+    tracker.forget_attributes()
+    assert tracker.cached(0) is None
+    assert tracker.needs_analysis(0)
@@ -0,0 +1,32 @@
+# tests/test_facedetector.py
+
+import numpy as np
+
+from scr.coreclasses.detectors import facedetector
+from scr.coreclasses.detectors.facedetector import FaceDetector
+
+
+class FakeDeepFace:
+    def __init__(self, faces):
+        self.faces = faces
+
+    def extract_faces(self, img_path, **kwargs):
+        return self.faces
+
+
+def _detector(monkeypatch, faces):
+    fake = FakeDeepFace(faces)
+    monkeypatch.setattr(facedetector, "import_deepface", lambda: fake)
+    return FaceDetector(backend="fake")
+
+
+def test_no_face_sentinel_is_dropped(monkeypatch):
+    sentinel = {"facial_area": {"x": 0, "y": 0, "w": 100, "h": 120}, "confidence": 0}
+    detector = _detector(monkeypatch, [sentinel])
+    assert detector._extract_boxes(np.zeros((120, 100, 3), np.uint8)) == []
+
+
+def test_face_filling_the_crop_is_kept(monkeypatch):
+    face = {"facial_area": {"x": 0, "y": 0, "w": 100, "h": 120}, "confidence": 0.93}
+    detector = _detector(monkeypatch, [face])
+    assert detector._extract_boxes(np.zeros((120, 100, 3), np.uint8)) == [(0, 0, 100, 120)]
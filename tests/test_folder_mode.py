@@ -0,0 +1,39 @@
+# tests/test_folder_mode.py
+
+import json
+import os
+from argparse import Namespace
+
+import cv2
+import numpy as np
+
+from scr.cli_run import run_folder_mode
+from scr.utils.benchmark import stub_stages
+from scr.utils.pipeline_builder import build_pipeline
+
+CONFIGS_ROOT = os.path.join(os.path.dirname(__file__), "..", "scr", "configs") + os.sep
+
+
+def _files_in_results(output):
+    with open(os.path.join(output, "results.jsonl"), "r", encoding="utf-8") as f:
+        return [json.loads(line)["file"] for line in f]
+
+
+def test_results_follow_sorted_file_order(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    names = [f"img_{i}.png" for i in range(5)]
+    for i, name in enumerate(names):
+        cv2.imwrite(str(images / name), np.full((120, 160, 3), i * 40, np.uint8))
+
+    stages = stub_stages("config_default.yaml", CONFIGS_ROOT)
+    pipeline = build_pipeline("config_default.yaml", CONFIGS_ROOT, stages=stages)
+    args = Namespace(input=str(images), output=str(tmp_path / "out"), no_cache=False, cache_dir=None,
+                     io_workers=2, batch_size=3, jpeg_quality=90)
+    run_folder_mode(pipeline, args)
+    assert _files_in_results(args.output) == names
+
+    # The first file now misses the cache and waits for a batch; the rest are cached
+    cv2.imwrite(str(images / names[0]), np.full((120, 160, 3), 7, np.uint8))
+    run_folder_mode(pipeline, args)
+    assert _files_in_results(args.output) == names
@@ -0,0 +1,82 @@
+# tests/test_job_journal.py
+
+import json
+import os
+import sys
+
+import pytest
+
+from scr import cli_run
+from scr.coreclasses.processing.job_journal import JobJournal
+from scr.utils import pipeline_builder
+from scr.utils.benchmark import make_synthetic_video, stub_stages
+
+CONFIGS_ROOT = os.path.join(os.path.dirname(__file__), "..", "scr", "configs") + os.sep
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingPipeline:
+    """Stub pipeline that fails on the batch numbered crash_at (0 = never)."""
+
+    def __init__(self, pipeline, crash_at):
+        self.pipeline = pipeline
+        self.crash_at = crash_at
+        self.batches = 0
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def process_batch(self, frames, **kwargs):
+        self.batches += 1
+        if self.batches == self.crash_at:
+            raise Crash()
+        return self.pipeline.process_batch(frames, **kwargs)
+
+
+BUILD_PIPELINE = pipeline_builder.build_pipeline
+
+
+def _run(monkeypatch, argv, crash_at=0):
+    def build(config_filename, *args, **kwargs):
+        stages = stub_stages(config_filename, CONFIGS_ROOT)
+        return CrashingPipeline(BUILD_PIPELINE(config_filename, CONFIGS_ROOT, stages=stages), crash_at)
+
+    monkeypatch.setattr(pipeline_builder, "build_pipeline", build)
+    monkeypatch.setattr(sys, "argv", ["cli_run"] + argv)
+    cli_run.main()
+
+
+def _frame_indices(path, key):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)[key] for line in f]
+
+
+def test_resume_after_crash_has_no_duplicates(tmp_path, monkeypatch):
+    video = make_synthetic_video(str(tmp_path / "clip.avi"), num_frames=48, width=160, height=120)
+    output = str(tmp_path / "out")
+    argv = ["--mode", "video", "--input", video, "--output", output, "--config", "config_default.yaml",
+            "--sink", "annotations", "--results", "jsonl", "--batch_size", "4", "--skip_frames", "1",
+            "--async_writers", "0", "--checkpoint_interval", "1"]
+
+    # Checkpoint after every second batch; batch 3 is written but not committed when batch 4 fails
+    calls = {"due": 0}
+
+    def every_other_batch(journal):
+        calls["due"] += 1
+        return calls["due"] % 2 == 0
+
+    monkeypatch.setattr(JobJournal, "due", every_other_batch)
+    with pytest.raises(Crash):
+        _run(monkeypatch, argv, crash_at=4)
+    assert _frame_indices(os.path.join(output, "annotations.jsonl"), "frame_index") == list(range(0, 24, 2))
+
+    _run(monkeypatch, argv + ["--resume"])
+    expected = list(range(0, 48, 2))
+    assert _frame_indices(os.path.join(output, "annotations.jsonl"), "frame_index") == expected
+    assert sorted(set(_frame_indices(os.path.join(output, "results.jsonl"), "frame_index"))) == expected
+
+    record = JobJournal.load(os.path.join(output, "job_journal.json"))
+    assert record["completed"] and record["frames_done"] == len(expected)
@@ -0,0 +1,87 @@
+# tests/test_result_store.py
+
+import json
+
+import numpy as np
+
+from scr.coreclasses.detectors.attribute_labels import EMOTION_LABELS
+from scr.coreclasses.processing.frame_result import FrameResult
+from scr.coreclasses.processing.result_store import CLASS_LABELS, ResultStore
+
+SCORES = {label: float(i) for i, label in enumerate(EMOTION_LABELS)}
+
+
+def _frames():
+    first = FrameResult(0, 0.0)
+    first.add_detection("person", (0, 0, 100, 200), score=0.9)
+    first.add_detection("face", (10, 10, 40, 40), emotion="happy", track_id=3)
+    second = FrameResult(5, None)
+    second.add_detection("face", (20, 20, 60, 60), dominant_emotion="sad", emotion=SCORES)
+    third = FrameResult(6, 0.24)
+    third.add_detection("face", (1, 2, 3, 4))
+    return [first, second, third, FrameResult(7, 0.28)]
+
+
+def _expected():
+    return [
+        {"frame_index": 0, "timestamp": 0.0, "box": [0, 0, 100, 200], "class_id": CLASS_LABELS.index("person"),
+         "track_id": -1, "emotion_id": -1, "emotion_scores": None},
+        {"frame_index": 0, "timestamp": 0.0, "box": [10, 10, 40, 40], "class_id": CLASS_LABELS.index("face"),
+         "track_id": 3, "emotion_id": EMOTION_LABELS.index("happy"), "emotion_scores": None},
+        {"frame_index": 5, "timestamp": None, "box": [20, 20, 60, 60], "class_id": CLASS_LABELS.index("face"),
+         "track_id": -1, "emotion_id": EMOTION_LABELS.index("sad"),
+         "emotion_scores": [SCORES[label] for label in EMOTION_LABELS]},
+        {"frame_index": 6, "timestamp": 0.24, "box": [1, 2, 3, 4], "class_id": CLASS_LABELS.index("face"),
+         "track_id": -1, "emotion_id": -1, "emotion_scores": None},
+    ]
+
+
+def _write(path, fmt):
+    store = ResultStore(str(path), fmt=fmt, chunk_size=3)
+    for frame_result in _frames():
+        store.append(frame_result)
+    store.close()
+    return store
+
+
+def test_jsonl_round_trip(tmp_path):
+    store = _write(tmp_path / "results.jsonl", "jsonl")
+    with open(tmp_path / "results.jsonl", "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+
+    assert len(store) == len(rows) == 4
+    assert [rows[0]["confidence"], rows[1]["confidence"]] == [np.float32(0.9).item(), None]
+    for row, expected in zip(rows, _expected()):
+        assert {key: row[key] for key in expected} == expected
+
+
+def test_npz_round_trip(tmp_path):
+    store = _write(tmp_path / "results.npz", "npz")
+    columns = ResultStore.load_npz(str(tmp_path / "results.npz"))
+
+    assert store.chunks_written == 2
+    assert len(columns["frame_index"]) == 4
+    for i, expected in enumerate(_expected()):
+        assert columns["frame_index"][i] == expected["frame_index"]
+        assert columns["box"][i].tolist() == expected["box"]
+        assert columns["class_id"][i] == expected["class_id"]
+        assert columns["track_id"][i] == expected["track_id"]
+        assert columns["emotion_id"][i] == expected["emotion_id"]
+        if expected["timestamp"] is None:
+            assert np.isnan(columns["timestamp"][i])
+        else:
+            assert columns["timestamp"][i] == expected["timestamp"]
+        if expected["emotion_scores"] is None:
+            assert np.isnan(columns["emotion_scores"][i]).all()
+        else:
+            assert columns["emotion_scores"][i].tolist() == expected["emotion_scores"]
+
+
+def test_npz_append_continues_chunk_numbering(tmp_path):
+    _write(tmp_path / "results.npz", "npz")
+    store = ResultStore(str(tmp_path / "results.npz"), fmt="npz", chunk_size=3, append=True)
+    store.append(_frames()[0])
+    store.close()
+
+    columns = ResultStore.load_npz(str(tmp_path / "results.npz"))
+    assert columns["frame_index"].tolist() == [0, 0, 5, 6, 0, 0]
@@ -0,0 +1,69 @@
+# tests/test_sharded_video.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from scr.coreclasses.processing.face_tracker import FaceTracker
+from scr.coreclasses.processing.frame_result import FrameResult
+from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.coreclasses.video.video_index import VideoIndex
+from scr.utils import parallel_pipeline, sharded_video
+from scr.utils.benchmark import make_synthetic_video
+from scr.utils.sharded_video import TRACK_ID_STRIDE, ShardedVideoRunner
+
+
+class TrackingPipeline:
+    """One tracked face per frame, enough to see segment boundaries in the merged stream."""
+
+    def __init__(self):
+        self.tracker = FaceTracker()
+
+    def reset(self):
+        self.tracker.reset()
+
+    def process_batch(self, frames, frame_indices, timestamps):
+        outputs = []
+        for frame, frame_index, timestamp in zip(frames, frame_indices, timestamps):
+            result = FrameResult(frame_index, timestamp)
+            track_id, = self.tracker.update([(10, 10, 50, 50)])
+            result.add_detection("face", (10, 10, 50, 50), track_id=track_id)
+            outputs.append((result, frame))
+        return outputs
+
+
+def _sequential(video, skip_frames):
+    grabber = VideoFrameGrabber(video, skip_frames=skip_frames, batch_size=4)
+    grabber.open()
+    indices, timestamps = [], []
+    try:
+        for _ in grabber:
+            indices += grabber.batch_frame_indices
+            timestamps += [grabber.timestamp_of(i) for i in grabber.batch_frame_indices]
+    finally:
+        grabber.close()
+    return indices, timestamps
+
+
+def test_merge_matches_sequential_run(tmp_path, monkeypatch):
+    video = make_synthetic_video(str(tmp_path / "clip.avi"), num_frames=60, width=160, height=120)
+    monkeypatch.setattr(parallel_pipeline, "_worker_pipeline", TrackingPipeline())
+    # Segments run one after another in this process instead of spawned workers
+    monkeypatch.setattr(sharded_video, "ProcessPoolExecutor",
+                        lambda max_workers, **kwargs: ThreadPoolExecutor(max_workers=1))
+
+    index = VideoIndex.load_or_build(video, str(tmp_path / "clip.index.json"))
+    segments = ShardedVideoRunner.align_segments(index.segments(3), 0, skip_frames=1)
+    assert len(segments) == 3
+
+    grabber_kwargs = {"video_path": video, "skip_frames": 1, "batch_size": 4}
+    with ShardedVideoRunner(2) as runner:
+        merged = list(runner.run(segments, grabber_kwargs, str(tmp_path / "out"), ["annotations"], {}))
+
+    indices, timestamps = _sequential(video, skip_frames=1)
+    assert [frame_index for frame_index, _ in merged] == indices
+    assert [result.timestamp for _, result in merged] == timestamps
+
+    # Track ids restart per segment and are namespaced by it in the merged stream
+    for frame_index, result in merged:
+        segment = next(i for i, (start, end, _) in enumerate(segments) if start <= frame_index < end)
+        track_id = result.get_faces()[0]["track_id"]
+        assert track_id == segment * TRACK_ID_STRIDE
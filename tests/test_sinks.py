@@ -0,0 +1,36 @@
+# tests/test_sinks.py
+
+import cv2
+import numpy as np
+
+from scr.coreclasses.output.sinks import VideoSink
+from scr.coreclasses.processing.frame_result import FrameResult
+
+
+def _write(path, timestamps, timed):
+    sink = VideoSink(str(path), fps=10.0, timed=timed)
+    image = np.zeros((64, 64, 3), np.uint8)
+    for frame_index, timestamp in enumerate(timestamps):
+        sink.write(frame_index, FrameResult(frame_index, timestamp), image)
+    sink.close()
+    return sink
+
+
+def _frame_count(path):
+    cap = cv2.VideoCapture(str(path))
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return count
+
+
+def test_timed_video_keeps_source_duration(tmp_path):
+    # Sampling slows from every 0.1 s to every 0.3 s, as an adaptive skip change would
+    timestamps = [2.0, 2.1, 2.2, 2.5, 2.8, 2.9]
+    sink = _write(tmp_path / "timed.mp4", timestamps, timed=True)
+    assert sink.frames_written == len(timestamps)
+    assert _frame_count(tmp_path / "timed.mp4") == 10  # 0.0 .. 0.9 s at 10 fps
+
+
+def test_untimed_video_writes_one_frame_each(tmp_path):
+    _write(tmp_path / "plain.mp4", [2.0, 2.1, 2.5], timed=False)
+    assert _frame_count(tmp_path / "plain.mp4") == 3
@@ -0,0 +1,15 @@
+# tests/test_video_frame_grabber.py
+
+from scr.coreclasses.video.video_frame_grabber import VideoFrameGrabber
+from scr.utils.benchmark import make_synthetic_video
+
+
+def test_close_stops_reader_blocked_on_full_queue(tmp_path):
+    video = make_synthetic_video(str(tmp_path / "clip.avi"), num_frames=40, width=160, height=120)
+    grabber = VideoFrameGrabber(video, batch_size=2, queue_size=1, ring_buffer=True)
+    grabber.open()
+    next(iter(grabber))  # the reader fills the queue and blocks on the next batch
+
+    grabber.close()
+    assert not grabber.reader_thread.is_alive()
+    assert not grabber.cap.isOpened()